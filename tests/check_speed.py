@@ -11,20 +11,31 @@ check_speed.py [-v| --verbose]:
 check_speed.py PARSER, INIFILE, OPTION, NUMBER
     check a specific setting
     cf. 'check_speed zconfigparser inifile3 select 100'
+    (PARSER 'zcolumn' gets all sections at once, by 'zcolumn')
 check_speed.py build
     build inifile 1 and 2
-    the repository already includes built files"""
+    the repository already includes built files
+check_speed.py parallel [NUMBER]
+    compare 'read' and 'read_parallel' of zconfigparser,
+    by NUMBER (default 2000) small inifiles
+check_speed.py memory [NUMBER]
+    compare memory (by tracemalloc) of zconfigparser,
+    with and without 'compact', by NUMBER (default 100000) sections"""
 
 
 import collections
 import configparser
 import cProfile
+import gc
 import io
 import os
 import pstats
 import random
 import re
 import sys
+import tempfile
+import time
+import tracemalloc
 
 import tosixinch.main as tmain
 import zconfigparser
@@ -55,6 +66,13 @@ def check(parser, inifile, option, num):
         config = zconfigparser.ZConfigParser()
         config.read(inifile)
         sections = config.zsections()
+    elif parser in ('zc', 'zcolumn'):
+        config = zconfigparser.ZConfigParser()
+        config.read(inifile)
+        sections = list(config.zsections())
+        for i in range(int(num)):
+            config.zcolumn(option, sections, default='')
+        return
 
     # print(len(sections))
     for section in list(sections) * int(num):
@@ -93,6 +111,70 @@ def check_all(verbose=False):
     sys.exit()
 
 
+def check_parallel(num=2000):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filenames = []
+        for i in range(int(num)):
+            filename = os.path.join(tmpdir, 'site%d.ini' % i)
+            with open(filename, 'w') as f:
+                f.write('[site%d : base]\n' % i)
+                for j in range(20):
+                    f.write('opt%d=value%d\n' % (j, i))
+            filenames.append(filename)
+
+        def timeit(read, *args):
+            config = zconfigparser.ZConfigParser()
+            start = time.perf_counter()
+            getattr(config, read)(filenames, *args)
+            return time.perf_counter() - start
+
+        timeit('read')  # warm up the filesystem cache
+        print('read: %.3f seconds' % timeit('read'))
+        for workers in (2, 4, 8, None):
+            sec = timeit('read_parallel', None, workers)
+            print('read_parallel (workers=%s): %.3f seconds' % (workers, sec))
+    sys.exit()
+
+
+def check_memory(num=100000):
+    # sections inherit from 10 bases, repeating option names and values
+    lines = []
+    for i in range(10):
+        lines.append('[base%d]' % i)
+        lines.extend('option%d = value%d' % (j, j % 3) for j in range(10))
+    for i in range(int(num)):
+        lines.append('[site%d : base%d]' % (i, i % 10))
+        for j in range(5):
+            value = ('on', 'off', 'site%d' % i)[j % 3]
+            lines.append('option%d = %s' % (j, value))
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = os.path.join(tmpdir, 'sites.ini')
+        with open(filename, 'w') as f:
+            f.write('\n'.join(lines))
+
+        for read, compact in (('read_string', False), ('read', False),
+                ('read_string', True), ('read', True)):
+            tracemalloc.start()
+            config = zconfigparser.ZConfigParser()
+            if read == 'read':
+                config.read(filename)
+            else:
+                config.read_string('\n'.join(lines))
+            if compact:
+                config.compact()
+            gc.collect()
+            size = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            start = time.perf_counter()
+            for i in range(0, int(num), 10):
+                config.get('site%d' % i, 'option7')
+            sec = time.perf_counter() - start
+            print('%s, compact=%s: %.1f MiB (get: %.3f seconds)' % (
+                read, compact, size / 2 ** 20, sec))
+            del config
+    sys.exit()
+
+
 def run(func, *args):
     pr = cProfile.Profile()
     pr.enable()
@@ -212,6 +294,14 @@ if __name__ == '__main__':
             check_all(verbose=True)
         elif argv[1] == 'build':
             build_inifile()
+        elif argv[1] == 'parallel':
+            check_parallel()
+        elif argv[1] == 'memory':
+            check_memory()
+    elif len(argv) == 3 and argv[1] == 'parallel':
+        check_parallel(argv[2])
+    elif len(argv) == 3 and argv[1] == 'memory':
+        check_memory(argv[2])
     elif len(argv) == 5:
         run(check, *argv[1:5])
         sys.exit()
@@ -1,4 +1,12 @@
 
+import configparser
+import importlib.util
+import io
+import os
+import subprocess
+import sys
+import threading
+
 import pytest
 
 import zconfigparser
@@ -274,3 +282,1174 @@ def test_default():
     confs = getconfs(s)
     assert confs.get('aa', 'y') == 'ddd'
     assert confs.get('DEFAULT', 'x') == 'ddd'
+
+## ------------------------------------------------------------------
+def test_cache_option():
+    s = '''
+    [bb.aa]
+    [bb]
+    x=bbb'''
+    confs = getconfs(s)
+    assert confs.get('aa', 'x') == 'bbb'
+    confs.set('bb', 'x', 'xxx')
+    assert confs.get('aa', 'x') == 'xxx'
+def test_cache_section():
+    s = '''
+    [bb.aa]
+    [bb]
+    x=bbb'''
+    confs = getconfs(s)
+    assert confs.get('aa', 'x') == 'bbb'
+    confs.remove_section('bb')
+    with pytest.raises(zconfigparser.NoZSectionError):
+        assert confs.get('aa', 'x') == 'bbb'
+    confs.read_string('''
+    [cc.bb]
+    [cc]
+    x=ccc''')
+    assert confs.get('aa', 'x') == 'ccc'
+def test_cache_remove_zsection():
+    s = '''
+    [bb.aa]
+    x=aaa
+    [bb]
+    x=bbb'''
+    confs = getconfs(s)
+    assert confs.get('aa', 'x') == 'aaa'
+    confs.remove_section('bb.aa')
+    assert confs.has_zsection('aa') == False
+    with pytest.raises(zconfigparser.NoZSectionError):
+        assert confs.get('aa', 'x') == 'aaa'
+
+## ------------------------------------------------------------------
+def test_freeze():
+    s = '''
+    [DEFAULT]
+    y=ddd
+    [bb.aa]
+    x=aaa
+    [bb]
+    x=bbb
+    z=bbb'''
+    confs = getconfs(s)
+    confs.freeze()
+    assert confs.get('aa', 'x') == 'aaa'
+    assert confs.get('bb.aa', 'z') == 'bbb'
+    assert confs.get('aa', 'y') == 'ddd'
+    assert confs.get('DEFAULT', 'y') == 'ddd'
+    assert confs.get('aa', 'x', vars={'x': 'vvv'}) == 'vvv'
+    assert confs.get('aa', 'w', fallback='www') == 'www'
+    with pytest.raises(zconfigparser.NoZOptionError):
+        assert confs.get('aa', 'w') == 'www'
+    with pytest.raises(zconfigparser.NoZSectionError):
+        assert confs.get('ss', 'x') == 'sss'
+def test_freeze_modify():
+    s = '''
+    [bb.aa]
+    [bb]
+    x=bbb'''
+    confs = getconfs(s)
+    confs.freeze()
+    with pytest.raises(zconfigparser.FrozenZConfigError):
+        confs.set('bb', 'x', 'xxx')
+    with pytest.raises(zconfigparser.FrozenZConfigError):
+        confs.remove_section('bb')
+    with pytest.raises(zconfigparser.FrozenZConfigError):
+        confs.read_string('[cc]')
+    with pytest.raises(zconfigparser.FrozenZConfigError):
+        confs['bb']['x'] = 'xxx'
+    with pytest.raises(zconfigparser.FrozenZConfigError):
+        confs['bb'] = {'y': 'yyy'}
+    with pytest.raises(zconfigparser.FrozenZConfigError):
+        confs['DEFAULT'] = {'y': 'yyy'}
+    assert confs.get('aa', 'x') == 'bbb'
+    assert confs._sections['bb'] == {'x': 'bbb'}
+def test_freeze_error():
+    s = '''
+    [bb.aa]
+    [cc.bb]
+    x=bbb'''
+    confs = getconfs(s)
+    with pytest.raises(zconfigparser.NoZSectionError):
+        confs.freeze()
+
+## ------------------------------------------------------------------
+def test_resolve_all():
+    s = '''
+    [DEFAULT]
+    y=ddd
+    [cc.bb.aa]
+    [dd.bb]
+    [ee.cc]
+    x=ccc
+    z=ccc
+    [dd]
+    x=ddd
+    [ee]
+    x=eee'''
+    confs = getconfs(s)
+    resolved = confs.resolve_all()
+    assert resolved['aa'] == {'x': 'ddd', 'y': 'ddd', 'z': 'ccc'}
+    assert resolved['ee'] == {'x': 'eee', 'y': 'ddd'}
+    assert set(resolved) == {'aa', 'bb', 'cc', 'dd', 'ee'}
+def test_resolve_all_nosection():
+    s = '''
+    [bb.aa]
+    [cc.bb]
+    x=bbb'''
+    confs = getconfs(s)
+    with pytest.raises(zconfigparser.NoZSectionError):
+        confs.resolve_all()
+def test_resolve_all_recursion():
+    s = '''
+    [bb.aa]
+    [cc.bb]
+    [aa.cc]
+    x=ccc'''
+    confs = getconfs(s)
+    with pytest.raises(zconfigparser.RecursiveZkeyError):
+        confs.resolve_all()
+def test_resolve_all_recursion2():
+    # the same section in two branches
+    s = '''
+    [cc.bb.aa]
+    [dd.bb]
+    [dd.cc]
+    [dd]
+    x=ddd'''
+    confs = getconfs(s)
+    with pytest.raises(zconfigparser.RecursiveZkeyError):
+        confs.get('aa', 'x')
+    with pytest.raises(zconfigparser.RecursiveZkeyError):
+        confs.resolve_all()
+
+## ------------------------------------------------------------------
+def test_validate():
+    s = '''
+    [cc.bb.aa]
+    [dd.bb]
+    [cc]
+    [dd]
+    x=ddd'''
+    confs = getconfs(s)
+    confs.validate()
+    assert confs._sections._zvalidated == True
+    assert confs.get('aa', 'x') == 'ddd'
+    confs.read_string('''
+    [ff.ee]''')
+    assert confs._sections._zvalidated == False
+def test_validate_errors():
+    s = '''
+    [bb.aa]
+    [cc.bb]
+    [aa.cc]
+    [ee.dd]
+    [hh.gg.ff]
+    [hh.gg]
+    [hh]
+    [jj.ii]
+    [ii]
+    [jj.jj]
+    [yy.xx.kk]'''
+    confs = getconfs(s)
+    with pytest.raises(zconfigparser.ZValidationError) as excinfo:
+        confs.validate()
+    errors = excinfo.value.errors
+    names = [e.__class__.__name__ for e in errors]
+    assert names.count('RecursiveZkeyError') == 3
+    assert names.count('NoZSectionError') == 3
+    assert names.count('DuplicateZKeyError') == 1
+def test_validate_duplicate_order():
+    for s in ('[aa]\n[bb.aa]\n[bb]', '[bb.aa]\n[aa]\n[bb]'):
+        confs = getconfs(s)
+        with pytest.raises(zconfigparser.ZValidationError) as excinfo:
+            confs.validate()
+        errors = excinfo.value.errors
+        assert len(errors) == 1
+        assert isinstance(errors[0], zconfigparser.DuplicateZKeyError)
+        assert confs._sections._zvalidated == False
+def test_validate_deep():
+    s = ['[s0]', 'x=aaa']
+    for i in range(1, 5000):
+        sec = '[bb.aa]'.replace('aa', 's%d' % i)
+        s.append(sec.replace('bb', 's%d' % (i - 1)))
+    confs = getconfs('\n'.join(s))
+    confs.validate()
+    assert confs.get('s4999', 'x') == 'aaa'
+
+## ------------------------------------------------------------------
+def test_get_raw():
+    s = '''
+    [DEFAULT]
+    y=%(x)s
+    [bb.aa]
+    x=aaa
+    [bb]
+    x=bbb
+    z=%(x)s'''
+    confs = getconfs(s)
+    assert confs.get('aa', 'z', raw=True) == '%(x)s'
+    assert confs.get('aa', 'z') == 'aaa'
+    assert confs.get('aa', 'y', raw=True) == '%(x)s'
+    assert confs.get('DEFAULT', 'y', raw=True) == '%(x)s'
+    assert confs.get('aa', 'w', raw=True, fallback=None) is None
+    assert confs.get('ss', 'x', raw=True, fallback=None) is None
+    with pytest.raises(zconfigparser.NoZOptionError):
+        confs.get('aa', 'w', raw=True)
+    with pytest.raises(zconfigparser.NoZSectionError):
+        confs.get('ss', 'x', raw=True)
+    confs.freeze()
+    assert confs.get('aa', 'z', raw=True) == '%(x)s'
+    assert confs.get('aa', 'w', raw=True, fallback=None) is None
+    with pytest.raises(zconfigparser.NoZSectionError):
+        confs.get('ss', 'x', raw=True)
+def test_get_nointerpolation():
+    s = '''
+    [aa]
+    x=%(y)s'''
+    conf = ZConfigParser(interpolation=None)
+    conf.read_string(s)
+    assert conf.get('aa', 'x') == '%(y)s'
+
+## ------------------------------------------------------------------
+def test_zlookup():
+    s = '''
+    [DEFAULT]
+    y=ddd
+    [bb.aa]
+    x=aaa
+    [bb]
+    z=%(x)s'''
+    confs = getconfs(s)
+    assert confs.zlookup('aa', 'x') == 'aaa'
+    assert confs.zlookup('aa', 'z') == 'aaa'
+    assert confs.zlookup('aa', 'z', raw=True) == '%(x)s'
+    assert confs.zlookup('aa', 'y') == 'ddd'
+    assert confs.zlookup('aa', 'w') is None
+    assert confs.zlookup('aa', 'w', 'www') == 'www'
+    assert confs.zlookup('ss', 'x', 'sss') == 'sss'
+def test_zlookup_misses():
+    s = '''
+    [bb.aa]
+    [bb]
+    x=bbb'''
+    confs = getconfs(s)
+    assert confs.zlookup('aa', 'w') is None
+    assert 'w' in confs._zmisses['aa']
+    confs.set('bb', 'w', 'www')
+    assert confs.zlookup('aa', 'w') == 'www'
+    assert confs.zlookup('cc', 'x') is None
+    confs.add_section('cc')
+    confs.set('cc', 'x', 'ccc')
+    assert confs.zlookup('cc', 'x') == 'ccc'
+    assert confs.has_zoption('cc', 'y') == False
+    confs.set('DEFAULT', 'y', 'ddd')
+    assert confs.has_zoption('cc', 'y') == True
+
+## ------------------------------------------------------------------
+def test_zsections_update():
+    s = '''
+    [bb.aa]
+    [bb]
+    x=bbb'''
+    confs = getconfs(s)
+    zsections = confs.zsections()
+    assert zsections == {'aa', 'bb', 'bb.aa'}
+    confs.add_section('bb.cc')
+    assert zsections == {'aa', 'bb', 'cc', 'bb.aa', 'bb.cc'}
+    confs.remove_section('bb.aa')
+    assert zsections == {'bb', 'cc', 'bb.cc'}
+    assert confs.has_zsection('aa') == False
+    assert confs.has_zsection('cc') == True
+
+## ------------------------------------------------------------------
+def test_zchildren():
+    s = '''
+    [cc.bb.aa]
+    [dd.bb]
+    [dd.cc]
+    [aa.ee]
+    [dd]
+    x=ddd'''
+    confs = getconfs(s)
+    assert confs.zchildren('dd') == ['bb', 'cc']
+    assert confs.zchildren('dd.bb') == ['aa']
+    assert confs.zchildren('ee') == []
+    assert sorted(confs.zdescendants('dd')) == ['aa', 'bb', 'cc', 'ee']
+    confs.remove_section('cc.bb.aa')
+    assert confs.zchildren('bb') == []
+    assert confs.zdescendants('dd') == ['bb', 'cc']
+def test_zchildren_recursion():
+    s = '''
+    [bb.aa]
+    [cc.bb]
+    [aa.cc]'''
+    confs = getconfs(s)
+    assert sorted(confs.zdescendants('aa')) == ['bb', 'cc']
+def test_zlookup_misses_descendants():
+    s = '''
+    [bb.aa]
+    [cc.bb]
+    [cc]
+    [dd]'''
+    confs = getconfs(s)
+    assert confs.zlookup('aa', 'x') is None
+    assert confs.zlookup('dd', 'x') is None
+    confs.set('cc', 'x', 'ccc')
+    assert 'aa' not in confs._zmisses
+    assert 'dd' in confs._zmisses
+    assert confs.zlookup('aa', 'x') == 'ccc'
+
+## ------------------------------------------------------------------
+def _write(path, s):
+    path.write_text(s)
+    stat = path.stat()
+    # make sure mtime changes
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+def test_reload(tmp_path):
+    f1 = tmp_path / 'f1.ini'
+    f2 = tmp_path / 'f2.ini'
+    _write(f1, '[bb.aa]\nx=aaa\n[bb]\nx=bbb\ny=bbb\n[cc]\nx=ccc\n')
+    _write(f2, '[bb]\ny=yyy\n')
+    conf = ZConfigParser(ZSEP='.')
+    assert conf.read([f1, f2]) == [str(f1), str(f2)]
+    conf.set('bb.aa', 'z', 'zzz')
+    assert conf.get('aa', 'y') == 'yyy'
+    assert conf.reload() == []
+    _write(f1, '[bb.aa]\nx=aaa\n[bb]\ny=bbb\n[dd]\nx=ddd\n')
+    assert conf.reload() == [str(f1)]
+    assert conf.get('aa', 'x') == 'aaa'
+    assert conf.get('aa', 'y') == 'yyy'
+    assert conf.get('aa', 'z') == 'zzz'
+    assert conf.has_option('bb', 'x') == False
+    assert conf.has_section('cc') == False
+    assert conf.get('dd', 'x') == 'ddd'
+    f2.unlink()
+    assert conf.reload() == [str(f2)]
+    assert conf.get('aa', 'y') == 'bbb'
+    assert conf.reload() == []
+    conf.freeze()
+    snapshot = conf._zsnapshot
+    assert conf.reload() == []
+    assert conf._zsnapshot is snapshot
+    _write(f2, '[bb]\ny=yyy\n')
+    assert conf.reload() == [str(f2)]
+    assert conf.get('aa', 'y') == 'yyy'
+def test_reload_keep(tmp_path):
+    f1 = tmp_path / 'f1.ini'
+    f2 = tmp_path / 'f2.ini'
+    _write(f1, '[aa]\nx=aaa\ny=aaa\n[bb]\nx=bbb\n')
+    _write(f2, '[aa]\ny=fff\n')
+    conf = ZConfigParser(ZSEP='.')
+    conf.read([f1, f2, f1])
+    assert conf.get('aa', 'y') == 'aaa'
+    conf.set('aa', 'x', 'override')
+    conf.set('bb', 'z', 'zzz')
+    _write(f1, '[aa]\nx=aaa\ny=aaa\nw=www\n')
+    _write(f2, '[aa]\ny=ggg\n')
+    assert conf.reload() == [str(f2), str(f1)]  # the last read order
+    assert conf.get('aa', 'x') == 'override'
+    assert conf.get('aa', 'w') == 'www'
+    assert conf.get('aa', 'y') == 'aaa'
+    assert conf.has_option('bb', 'x') == False
+    assert conf.get('bb', 'z') == 'zzz'
+    _write(f1, '[aa]\nx=xxx\ny=aaa\n')
+    conf.reload()
+    assert conf.get('aa', 'x') == 'xxx'
+def test_reload_touch(tmp_path):
+    f1 = tmp_path / 'f1.ini'
+    _write(f1, '[aa]\nx=aaa\n')
+    conf = ZConfigParser(ZSEP='.')
+    conf.read(f1)
+    _write(f1, '[aa]\nx=aaa\n')
+    assert conf.reload() == []
+def test_reload_frozen(tmp_path):
+    f1 = tmp_path / 'f1.ini'
+    _write(f1, '[bb.aa]\n[bb]\nx=bbb\n')
+    conf = ZConfigParser(ZSEP='.')
+    conf.read(f1)
+    conf.freeze()
+    assert conf.zlookup('aa', 'y') is None
+    _write(f1, '[cc.aa]\n[cc]\nx=ccc\ny=ccc\n')
+    assert conf.reload() == [str(f1)]
+    assert conf.get('aa', 'x') == 'ccc'
+    assert conf.zlookup('aa', 'y') == 'ccc'
+    assert conf.has_zsection('bb') == False
+    assert conf['cc']['x'] == 'ccc'
+    with pytest.raises(zconfigparser.FrozenZConfigError):
+        conf.set('cc', 'x', 'xxx')
+def test_reload_frozen_threads(tmp_path):
+    f1 = tmp_path / 'f1.ini'
+    # many sections, for in-place updates to take time
+    versions = []
+    for parent in ('bb', 'cc'):
+        sec = '[bb.aa]'.replace('bb', parent)
+        s = [sec.replace('aa', 'a%d' % i) for i in range(200)]
+        s.append('[%s]\nx=%s%s\ny=%%(x)s-%s\n' % (
+            parent, parent, parent[0], parent))
+        versions.append('\n'.join(s))
+    _write(f1, versions[0])
+    conf = ZConfigParser(ZSEP='.')
+    conf.read(f1)
+    conf.freeze()
+    errors = []
+    done = threading.Event()
+
+    def read():
+        while not done.is_set():
+            try:
+                for name in ('a0', 'a100', 'a199'):
+                    assert conf.get(name, 'x') in ('bbb', 'ccc')
+                    assert conf.get(name, 'x', raw=True) in ('bbb', 'ccc')
+                    assert conf.has_zoption(name, 'x')
+                    assert conf.has_zsection(name)
+                    assert conf.get(name, 'y') in ('bbb-bb', 'ccc-cc')
+                values = set(conf.zcolumn('y').values())
+                assert values <= {'bbb-bb', 'ccc-cc'}
+            except Exception as e:
+                errors.append(e)
+                return
+
+    readers = [threading.Thread(target=read) for i in range(4)]
+    for reader in readers:
+        reader.start()
+    try:
+        for i in range(10):
+            _write(f1, versions[i % 2])
+            conf.reload()
+    finally:
+        done.set()
+        for reader in readers:
+            reader.join()
+    assert errors == []
+
+## ------------------------------------------------------------------
+def test_snapshot(tmp_path):
+    f1 = tmp_path / 'f1.ini'
+    snap = tmp_path / 'snap'
+    _write(f1, '[bb.aa]\nx=aaa\n[bb]\ny=bbb\n')
+    conf = ZConfigParser(ZSEP='.')
+    conf.read(f1)
+    conf.get('aa', 'y')
+    conf.save_snapshot(snap)
+    conf = ZConfigParser(ZSEP='.')
+    assert conf.load_snapshot(snap, [f1]) == [str(f1)]
+    assert conf._sections.zdata == {'aa': 'bb.aa'}
+    assert conf.get('aa', 'y') == 'bbb'
+    assert conf['bb.aa']['x'] == 'aaa'
+    conf.set('bb', 'y', 'yyy')
+    assert conf.get('aa', 'y') == 'yyy'
+    _write(f1, '[bb.aa]\nx=aaa\n[bb]\ny=bbb\n')
+    assert conf.reload() == []
+def test_snapshot_modified(tmp_path):
+    f1 = tmp_path / 'f1.ini'
+    f2 = tmp_path / 'f2.ini'
+    snap = tmp_path / 'snap'
+    _write(f1, '[bb.aa]\nx=aaa\n[bb]\ny=bbb\n')
+    _write(f2, '[cc]\nx=ccc\n')
+    conf = ZConfigParser(ZSEP='.')
+    conf.read(f1)
+    conf.save_snapshot(snap)
+    conf = ZConfigParser(ZSEP='.')
+    conf.load_snapshot(snap, [f1, f2])
+    assert conf.get('cc', 'x') == 'ccc'
+    _write(f1, '[bb.aa]\nx=aaa\n[bb]\ny=yyy\n')
+    conf = ZConfigParser(ZSEP='.')
+    conf.load_snapshot(snap)
+    assert conf.get('aa', 'y') == 'yyy'
+    snap.write_bytes(b'xxx')
+    conf = ZConfigParser(ZSEP='.')
+    conf.load_snapshot(snap, [f1])
+    assert conf.get('aa', 'y') == 'yyy'
+def test_snapshot_settings(tmp_path):
+    f1 = tmp_path / 'f1.ini'
+    snap = tmp_path / 'snap'
+    _write(f1, '[aa]\nX=aaa\n')
+    conf = ZConfigParser(ZSEP='.')
+    conf.optionxform = str
+    conf.read(f1)
+    conf.save_snapshot(snap)
+    conf = ZConfigParser(ZSEP='.')
+    assert conf.load_snapshot(snap) == [str(f1)]
+    assert conf.get('aa', 'X') == 'aaa'
+    assert conf._sections['aa'] == {'x': 'aaa'}
+    state = conf._zload_snapshot(snap)
+    assert conf._zcheck_snapshot(state, [f1]) == False
+    conf = ZConfigParser(allow_no_value=True)
+    conf.optionxform = str
+    assert conf._zcheck_snapshot(state, [f1]) == False
+    conf = ZConfigParser(ZSEP='.')
+    conf.optionxform = str
+    assert conf._zcheck_snapshot(state, [f1]) == True
+def test_zdict_copy():
+    s = '''
+    [bb.aa]
+    [bb]
+    x=bbb'''
+    confs = getconfs(s)
+    zdict = confs._sections.copy()
+    assert zdict.ZSEP == confs.ZSEP
+    assert zdict.zget('aa') == ({}, {'x': 'bbb'})
+    del zdict['bb.aa']
+    assert confs.has_zsection('aa') == True
+
+## ------------------------------------------------------------------
+def test_write_module(tmp_path):
+    s = '''
+    [DEFAULT]
+    x=ddd
+    y=ddd
+    [bb.aa]
+    x=aaa
+    [bb]
+    z=%(x)s'''
+    confs = getconfs(s)
+    path = tmp_path / 'zconfmod.py'
+    with open(path, 'w') as f:
+        confs.write_module(f)
+    spec = importlib.util.spec_from_file_location('zconfmod', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    resolved = zconfigparser.ResolvedZConfig.from_module(module)
+    assert resolved.get('aa', 'z') == 'aaa'
+    assert resolved.get('bb.aa', 'Z') == 'aaa'
+    assert resolved.get('bb', 'z') == 'ddd'
+    assert resolved.get('aa', 'y') == 'ddd'
+    assert resolved.get('DEFAULT', 'y') == 'ddd'
+    assert resolved.get('aa', 'w', fallback=None) is None
+    with pytest.raises(zconfigparser.NoZOptionError):
+        resolved.get('aa', 'w')
+    with pytest.raises(zconfigparser.NoZSectionError):
+        resolved.get('ss', 'x')
+    assert resolved.zsections() == confs.zsections()
+    assert resolved.has_zsection('bb.aa') == True
+    assert resolved.has_zsection('ss') == False
+    assert resolved.has_zoption('aa', 'x') == True
+    assert resolved.has_zoption('bb', 'w') == False
+def test_write_module_interpolation(tmp_path):
+    s = '''
+    [DEFAULT]
+    c=%(d)s
+    d=1
+    [base.aa]
+    [base]
+    a=100%%
+    b=%(a)s done'''
+    confs = getconfs(s)
+    path = tmp_path / 'zconfmod2.py'
+    with open(path, 'w') as f:
+        confs.write_module(f)
+    spec = importlib.util.spec_from_file_location('zconfmod2', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    resolved = zconfigparser.ResolvedZConfig.from_module(module)
+    for section in ('aa', 'base', 'DEFAULT'):
+        for option in ('a', 'b', 'c'):
+            assert resolved.get(section, option, fallback=None) == (
+                confs.get(section, option, fallback=None))
+    assert resolved.get('aa', 'b') == '100% done'
+    assert resolved.get('DEFAULT', 'c') == '1'
+    shm = confs.export_shared()
+    try:
+        shared = zconfigparser.SharedZConfig(shm.name)
+        assert shared.get('aa', 'a') == '100%'
+        assert shared.get('aa', 'b') == '100% done'
+        assert shared.get('DEFAULT', 'c') == '1'
+        shared.close()
+    finally:
+        shm.close()
+        shm.unlink()
+
+## ------------------------------------------------------------------
+def test_read_lazy(tmp_path):
+    f1 = tmp_path / 'f1.ini'
+    _write(f1, '# comment\n[DEFAULT]\nw=ddd\n[bb.aa]\nx=aaa\n'
+        '[bb]\nx=bbb\ny=bbb\n  yyy\n[cc]\nx=ccc\n')
+    conf = ZConfigParser(ZSEP='.')
+    conf.read_lazy(f1)
+    lazy = zconfigparser._ZLazySection
+    assert all(isinstance(v, lazy) for v in conf._sections.values())
+    assert conf.sections() == ['bb.aa', 'bb', 'cc']
+    assert conf.get('aa', 'y') == 'bbb\nyyy'
+    assert conf.get('aa', 'w') == 'ddd'
+    assert not isinstance(conf._sections['bb'], lazy)
+    assert conf._sections['cc'].zloaded == False
+    assert conf.items('cc') == [('w', 'ddd'), ('x', 'ccc')]
+    assert not isinstance(conf._sections['cc'], lazy)
+def test_read_lazy_duplicates(tmp_path):
+    f1 = tmp_path / 'f1.ini'
+    _write(f1, '[aa]\nx=aaa\n[bb]\nx=bbb\n[aa]\ny=aaa\n')
+    conf = ZConfigParser(ZSEP='.')
+    with pytest.raises(configparser.DuplicateSectionError) as e:
+        conf.read_lazy(f1)
+    assert e.value.lineno == 5
+    conf = ZConfigParser(strict=False)
+    conf.read_lazy(f1)
+    assert conf.get('aa', 'y') == 'aaa'
+    assert conf.get('aa', 'x') == 'aaa'
+def test_iter_zsections():
+    s = '''# comment
+[DEFAULT]
+w=ddd
+[cc.bb.aa]
+x=aaa
+  [xx]
+[bb]
+[cc]
+x=ccc
+'''
+    conf = ZConfigParser(ZSEP='.')
+    gen = conf.iter_zsections(io.StringIO(s))
+    assert next(gen) == ('DEFAULT', 'DEFAULT', [], {'w': 'ddd'})
+    assert next(gen) == ('aa', 'cc.bb.aa', ['bb', 'cc'],
+        {'x': 'aaa\n[xx]'})
+    assert list(gen) == [
+        ('bb', 'bb', [], {}), ('cc', 'cc', [], {'x': 'ccc'})]
+    assert conf.sections() == []
+    with pytest.raises(configparser.DuplicateSectionError):
+        list(conf.iter_zsections(io.StringIO('[aa]\n[bb]\n[aa]\n')))
+def test_read_parallel(tmp_path):
+    files = []
+    for i in range(20):
+        f = tmp_path / ('f%d.ini' % i)
+        s = '[bb.aa]\nx=aaa\n[bb]\nx=bbb\ny=yyy\n'.replace('yyy', str(i))
+        _write(f, s)
+        files.append(f)
+    files.insert(5, tmp_path / 'nonexistent.ini')
+    conf = ZConfigParser(ZSEP='.')
+    read_ok = conf.read_parallel(files, workers=4)
+    assert read_ok == [str(f) for f in files if f.exists()]
+    assert conf.get('aa', 'y') == '19'
+    assert conf.reload() == []
+
+    _write(files[10], '[bb.aa]\nx=aaa\n[cc]\n[cc]\n')
+    conf = ZConfigParser(ZSEP='.')
+    with pytest.raises(configparser.DuplicateSectionError):
+        conf.read_parallel(files, workers=2)
+    assert conf.has_section('cc') == True
+    assert conf.get('aa', 'y') == '8'
+
+    _write(files[10], '[bb.aa]\nx=aaa\n[cc.aa]\n')
+    errors = []
+    for workers in (1, 2):
+        conf = ZConfigParser(ZSEP='.')
+        with pytest.raises(zconfigparser.DuplicateZKeyError) as e:
+            conf.read_parallel(files, workers=workers)
+        errors.append((str(e.value), conf.get('aa', 'y')))
+    conf = ZConfigParser(ZSEP='.')
+    with pytest.raises(zconfigparser.DuplicateZKeyError) as e:
+        conf.read(files)
+    assert errors == [(str(e.value), conf.get('aa', 'y'))] * 2
+def test_read_parallel_settings(tmp_path):
+    f1 = tmp_path / 'f1.ini'
+    f2 = tmp_path / 'f2.ini'
+    _write(f1, '[aa]\nX: aaa\n')
+    _write(f2, '[bb]\nY: bbb\n')
+    conf = ZConfigParser(delimiters=(':',))
+    conf.optionxform = str
+    assert conf.read_parallel([f1, f2], workers=2) == [str(f1), str(f2)]
+    assert conf.get('aa', 'X') == 'aaa'
+    assert conf.get('bb', 'Y') == 'bbb'
+
+## ------------------------------------------------------------------
+def test_export_shared():
+    s = '''
+    [DEFAULT]
+    x=ddd
+    y=ddd
+    [bb.aa]
+    x=aaa
+    [bb]
+    z=%(x)s
+    [cc]
+    u=éé'''
+    confs = getconfs(s)
+    shm = confs.export_shared()
+    try:
+        shared = zconfigparser.SharedZConfig(shm.name)
+        assert shared.get('aa', 'z') == 'aaa'
+        assert shared.get('bb.aa', 'Z') == 'aaa'
+        assert shared.get('bb', 'z') == 'ddd'
+        assert shared.get('cc', 'u') == 'éé'
+        assert shared.get('DEFAULT', 'y') == 'ddd'
+        assert shared.get('aa', 'w', fallback=None) is None
+        with pytest.raises(zconfigparser.NoZOptionError):
+            shared.get('aa', 'w')
+        with pytest.raises(zconfigparser.NoZSectionError):
+            shared.get('ss', 'x')
+        assert shared.zsections() == set(confs.zsections())
+        assert shared.has_zsection('bb.aa') == True
+        assert shared.has_zsection('DEFAULT') == False
+        assert shared.has_zoption('aa', 'y') == True
+        assert shared.has_zoption('bb', 'w') == False
+        shared.close()
+        # a worker attaching and exiting doesn't unlink the block
+        code = ('import zconfigparser; '
+            'zconfigparser.SharedZConfig(%r).close()' % shm.name)
+        env = dict(os.environ, PYTHONPATH=os.path.dirname(
+            os.path.abspath(zconfigparser.__file__)))
+        # (capturing output waits for its resource tracker process too)
+        result = subprocess.run([sys.executable, '-c', code], env=env,
+            capture_output=True, text=True, check=True)
+        assert 'leaked' not in result.stderr
+        shared = zconfigparser.SharedZConfig(shm.name)
+        assert shared.get('aa', 'z') == 'aaa'
+        shared.close()
+    finally:
+        shm.close()
+        shm.unlink()
+def test_export_shared_forked():
+    # forked workers share the creator's resource tracker
+    code = '''if 1:
+        import multiprocessing, zconfigparser
+        def work(name):
+            zconfigparser.SharedZConfig(name).close()
+        conf = zconfigparser.ZConfigParser()
+        conf.read_string('[aa]\\nx=aaa\\n')
+        shm = conf.export_shared()
+        context = multiprocessing.get_context('fork')
+        workers = [context.Process(target=work, args=(shm.name,))
+            for i in range(3)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        assert zconfigparser.SharedZConfig(shm.name).get('aa', 'x') == 'aaa'
+        shm.close()
+        shm.unlink()
+    '''
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(
+        os.path.abspath(zconfigparser.__file__)))
+    result = subprocess.run([sys.executable, '-c', code], env=env,
+        capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert 'Traceback' not in result.stderr
+    assert 'leaked' not in result.stderr
+
+## ------------------------------------------------------------------
+def test_use_sqlite(tmp_path):
+    path = tmp_path / 'conf.sqlite'
+    conf = ZConfigParser(ZSEP='.')
+    conf.read_string('[DEFAULT]\nw=ddd\n[bb.aa]\nx=aaa\n[bb]\ny=bbb\n')
+    conf.use_sqlite(path, cache_size=1)
+    stored = zconfigparser._ZStoredSection
+    assert isinstance(conf._sections['bb'], stored)
+    assert conf.get('aa', 'y') == 'bbb'
+    assert conf.get('aa', 'w') == 'ddd'
+    conf.read_string('[aa.cc]\nz=ccc\n[bb]\nv=vvv\n')
+    conf.set('bb', 'y', 'yyy')
+    conf.remove_option('bb.aa', 'x')
+    assert conf.get('cc', 'y') == 'yyy'
+
+    conf = ZConfigParser(ZSEP='.')
+    conf.read_string('[dd]\n')
+    conf.use_sqlite(path)
+    assert conf.sections() == ['bb.aa', 'bb', 'aa.cc', 'dd']
+    assert conf.get('cc', 'v') == 'vvv'
+    assert conf.get('cc', 'w') == 'ddd'
+    assert conf.has_option('aa', 'x') == False
+    conf.remove_section('aa.cc')
+    assert conf.has_zsection('cc') == False
+    conf = ZConfigParser(ZSEP='.')
+    conf.use_sqlite(path)
+    assert conf.sections() == ['bb.aa', 'bb', 'dd']
+    conf.freeze()
+    assert conf.get('aa', 'y') == 'yyy'
+def test_use_sqlite_reload_frozen(tmp_path):
+    path = tmp_path / 'conf.sqlite'
+    f1 = tmp_path / 'f1.ini'
+    _write(f1, '[bb.aa]\nx=aaa\n[bb]\ny=bbb\n')
+    conf = ZConfigParser(ZSEP='.')
+    conf.read(f1)
+    conf.use_sqlite(path)
+    conf.freeze()
+    _write(f1, '[bb.aa]\nx=xxx\n[bb]\ny=bbb\n[cc]\nz=ccc\n')
+    assert conf.reload() == [str(f1)]
+    assert conf.get('aa', 'x') == 'xxx'
+    assert conf._sections.zstore is not None
+    stored = zconfigparser._ZStoredSection
+    assert isinstance(conf._sections['bb'], stored)
+    conf = ZConfigParser(ZSEP='.')
+    conf.use_sqlite(path)
+    assert conf.get('aa', 'x') == 'xxx'
+    assert conf.get('cc', 'z') == 'ccc'
+
+## ------------------------------------------------------------------
+def test_compact():
+    s = '''
+    [DEFAULT]
+    w=ddd
+    [bb.aa]
+    x=aaa
+    y=on
+    [bb]
+    x=bbb
+    y=on
+    [cc]
+    x=ccc
+    y=off'''
+    confs = getconfs(s)
+    confs.compact()
+    compact = zconfigparser._ZCompactSection
+    aa = confs._sections['bb.aa']
+    bb = confs._sections['bb']
+    assert isinstance(aa, compact)
+    assert aa._shape is bb._shape
+    assert aa['y'] is bb['y']
+    assert confs.get('aa', 'x') == 'aaa'
+    assert confs.get('aa', 'w') == 'ddd'
+    confs.set('bb', 'z', 'zzz')
+    assert confs.get('aa', 'z') == 'zzz'
+    assert confs.items('cc') == [('w', 'ddd'), ('x', 'ccc'), ('y', 'off')]
+    confs.remove_option('cc', 'x')
+    assert confs.has_option('cc', 'x') == False
+    assert confs.get('cc', 'y') == 'off'
+
+## ------------------------------------------------------------------
+def test_from_sections():
+    records = [
+        ('DEFAULT', [], {'W': 'ddd'}),
+        ('aa', ['bb', 'cc'], {'x': 1}),
+        ('bb', [], {'y': 'bbb', 'z': None}),
+        ('cc', [], {'y': 'ccc', 'u': 'ccc'}),
+    ]
+    conf = ZConfigParser.from_sections(records, allow_no_value=True)
+    aa = conf.ZSEP.join(['aa', 'bb', 'cc'])
+    assert conf.sections() == [aa, 'bb', 'cc']
+    assert conf.get('aa', 'x') == '1'
+    assert conf.get('aa', 'y') == 'bbb'
+    assert conf.get('aa', 'u') == 'ccc'
+    assert conf.get('aa', 'w') == 'ddd'
+    assert conf.get('aa', 'z') is None
+    assert conf.zchildren('cc') == ['aa']
+    with pytest.raises(zconfigparser.DuplicateZKeyError):
+        ZConfigParser.from_sections([('aa', [], {}), ('aa', [], {})])
+    with pytest.raises(zconfigparser.ZValidationError) as e:
+        ZConfigParser.from_sections([('aa', ['bb'], {}), ('cc', ['aa'], {})])
+    assert len(e.value.errors) == 1
+    for records in (
+            [('aa', [], {}), ('aa', ['bb'], {}), ('bb', [], {})],
+            [('aa', ['bb'], {}), ('aa', [], {}), ('bb', [], {})]):
+        with pytest.raises(zconfigparser.ZValidationError) as e:
+            ZConfigParser.from_sections(records)
+        assert len(e.value.errors) == 1
+
+## ------------------------------------------------------------------
+def test_zcolumn():
+    s = '''
+    [DEFAULT]
+    y=ddd
+    [cc.bb.aa]
+    [dd.bb]
+    [ee.cc]
+    x=ccc
+    [dd]
+    [ee]
+    x=eee
+    [ee.ff]
+    x=%(y)s'''
+    confs = getconfs(s)
+    expected = {'aa': 'ccc', 'bb': None, 'cc': 'ccc', 'dd': None,
+        'ee': 'eee', 'ff': 'ddd'}
+    assert confs.zcolumn('x') == expected
+    for section, value in expected.items():
+        assert confs.get(section, 'x', fallback=None) == value
+    assert confs.zcolumn('X', ['ff', 'cc.bb.aa'], raw=True) == {
+        'ff': '%(y)s', 'cc.bb.aa': 'ccc'}
+    assert confs.zcolumn('y', ['DEFAULT', 'ee'], lists=True) == (
+        ['DEFAULT', 'ee'], ['ddd', 'ddd'])
+    assert confs.zcolumn('w', ['aa'], default='www') == {'aa': 'www'}
+    with pytest.raises(zconfigparser.NoZSectionError):
+        confs.zcolumn('x', ['gg'])
+    confs.freeze()
+    assert confs.zcolumn('x') == expected
+def test_zcolumn_invalid():
+    s = '''
+    [cc.bb.aa]
+    [dd.bb]
+    [dd.cc]
+    [dd]
+    x=ddd
+    [ff.ee]
+    x=eee'''
+    confs = getconfs(s)
+    assert confs.zcolumn('x', ['bb', 'dd']) == {'bb': 'ddd', 'dd': 'ddd'}
+    with pytest.raises(zconfigparser.RecursiveZkeyError):
+        confs.zcolumn('x', ['aa'])
+    with pytest.raises(zconfigparser.NoZSectionError):
+        confs.zcolumn('x', ['ee'])
+
+## ------------------------------------------------------------------
+def test_zitems():
+    s = '''
+    [DEFAULT]
+    w=ddd
+    [bb.aa]
+    x=aaa
+    [bb]
+    x=bbb
+    y=%(x)s'''
+    confs = getconfs(s)
+    assert confs.zoptions('aa') == ['x', 'y', 'w']
+    assert confs.zitems('aa') == [('x', 'aaa'), ('y', 'aaa'), ('w', 'ddd')]
+    assert confs.zitems('bb.aa', raw=True, vars={'V': 'vvv'}) == [
+        ('x', 'aaa'), ('y', '%(x)s'), ('w', 'ddd'), ('v', 'vvv')]
+    assert confs.zitems('DEFAULT') == [('w', 'ddd')]
+    with pytest.raises(zconfigparser.NoZSectionError):
+        confs.zoptions('cc')
+    confs.set('bb', 'z', 'zzz')
+    assert confs.zoptions('aa') == ['x', 'y', 'z', 'w']
+    confs.set('DEFAULT', 'u', 'uuu')
+    assert confs.zoptions('aa') == ['x', 'y', 'z', 'w', 'u']
+    confs.remove_option('bb.aa', 'x')
+    assert confs.zitems('aa')[:2] == [('x', 'bbb'), ('y', 'bbb')]
+    confs.freeze()
+    assert sorted(confs.zoptions('aa')) == ['u', 'w', 'x', 'y', 'z']
+def test_z_views():
+    s = '''
+    [bb.aa]
+    x=aaa
+    [bb]
+    y=bbb'''
+    confs = getconfs(s)
+    aa = confs.z['aa']
+    assert aa.name == 'bb.aa'
+    assert aa['y'] == 'bbb'
+    assert 'y' in aa
+    assert list(aa) == ['x', 'y']
+    assert dict(aa) == {'x': 'aaa', 'y': 'bbb'}
+    assert aa.get('z') is None
+    with pytest.raises(KeyError):
+        aa['z']
+    aa['z'] = 'zzz'
+    assert confs.get('bb.aa', 'z') == 'zzz'
+    del aa['z']
+    assert 'z' not in aa
+    assert 'cc' not in confs.z
+    assert len(confs.z) == 3
+
+## ------------------------------------------------------------------
+def test_interpolation_cache():
+    s = '''
+    [DEFAULT]
+    root=/srv
+    [bb.aa]
+    name=aa
+    [bb]
+    dir=%(root)s/%(name)s'''
+    confs = getconfs(s)
+    assert confs.get('aa', 'dir') == '/srv/aa'
+    assert 'aa' in confs._zinterpolated
+    confs.set('bb', 'dir', '%(root)s/x/%(name)s')
+    assert confs.get('aa', 'dir') == '/srv/x/aa'
+    confs.set('DEFAULT', 'root', '/var')
+    assert confs.get('aa', 'dir') == '/var/x/aa'
+    assert confs.get('aa', 'dir', vars={'name': 'vv'}) == '/var/x/vv'
+    confs.freeze()
+    assert confs.get('bb.aa', 'dir') == '/var/x/aa'
+    assert confs._zsnapshot.interpolated['bb.aa'] == {'dir': '/var/x/aa'}
+def test_zextended_interpolation():
+    conf = ZConfigParser(interpolation=zconfigparser.ZExtendedInterpolation())
+    aa = conf.ZSEP.join(['aa', 'bb'])
+    s = '''
+    [%s]
+    name=aa
+    [bb]
+    dir=/srv/${name}
+    [cc]
+    x=${aa:dir}
+    y=${%s:name}
+    z=${dd:x}
+    [dd]
+    x=${cc:x}!''' % (aa, aa)
+    conf.read_string(s)
+    assert conf.get('cc', 'x') == '/srv/aa'
+    assert conf.get('cc', 'y') == 'aa'
+    assert conf.get('dd', 'x') == '/srv/aa!'
+    conf.set(aa, 'name', 'AA')
+    assert conf.get('dd', 'x') == '/srv/AA!'
+    with pytest.raises(configparser.InterpolationDepthError):
+        conf.set('cc', 'x', '${dd:x}')
+        conf.get('cc', 'x')
+
+## ------------------------------------------------------------------
+def test_interpolate_all():
+    s = '''
+    [DEFAULT]
+    root=/srv
+    [bb.aa]
+    name=aa
+    [bb]
+    name=bb
+    dir=%(root)s/%(name)s
+    rate=100%%'''
+    confs = getconfs(s)
+    values = confs.interpolate_all()
+    assert values['aa']['dir'] == '/srv/aa'
+    assert values['bb']['dir'] == '/srv/bb'
+    assert values['bb']['rate'] == '100%'
+    assert values['DEFAULT'] == {'root': '/srv'}
+    for section, options in values.items():
+        for option, value in options.items():
+            assert confs.get(section, option) == value
+    assert confs._zinterpolated['aa']['dir'] == '/srv/aa'
+    assert confs._zinterpolated['bb']['dir'] == '/srv/bb'
+    assert confs._zinterpolated['DEFAULT'] == {'root': '/srv'}
+def test_interpolate_all_errors():
+    s = '''
+    [aa]
+    a=%(b)s
+    b=%(a)s
+    c=%(x)s
+    d=%(c)s
+    e=5%
+    f=ok'''
+    confs = getconfs(s)
+    with pytest.raises(zconfigparser.ZValidationError) as excinfo:
+        confs.interpolate_all()
+    errors = excinfo.value.errors
+    assert len(errors) == 3
+    assert isinstance(errors[0], configparser.InterpolationDepthError)
+    assert isinstance(errors[1], configparser.InterpolationMissingOptionError)
+    assert isinstance(errors[2], configparser.InterpolationSyntaxError)
+    assert confs.get('aa', 'f') == 'ok'
+def test_interpolate_all_zextended():
+    conf = ZConfigParser(interpolation=zconfigparser.ZExtendedInterpolation())
+    aa = conf.ZSEP.join(['aa', 'bb'])
+    s = '''
+    [%s]
+    name=aa
+    [bb]
+    name=bb
+    dir=/srv/${name}
+    [cc]
+    x=${aa:dir} $$
+    y=${%s:dir}''' % (aa, aa)
+    conf.read_string(s)
+    values = conf.interpolate_all()
+    assert values['cc'] == {'x': '/srv/aa $', 'y': '/srv/aa'}
+    conf.set('cc', 'z', '${dd:x}')
+    with pytest.raises(zconfigparser.ZValidationError):
+        conf.interpolate_all()
+
+## ------------------------------------------------------------------
+def test_typed_getters():
+    s = '''
+    [DEFAULT]
+    timeout=30
+    [bb.aa]
+    rate=%(timeout)s0
+    [bb]
+    debug=yes'''
+    confs = getconfs(s)
+    assert confs.getint('aa', 'rate') == 300
+    assert confs.getfloat('aa', 'timeout') == 30.0
+    assert confs.getboolean('aa', 'debug') is True
+    assert confs['bb.aa'].getint('rate') == 300
+    assert ('rate', False, int) in confs._zconverted['aa']
+    assert confs.getint('aa', 'nooption', fallback=0) == 0
+    with pytest.raises(zconfigparser.NoZOptionError):
+        confs.getint('aa', 'nooption')
+    with pytest.raises(zconfigparser.NoZSectionError):
+        confs.getint('cc', 'rate')
+    with pytest.raises(ValueError):
+        confs.getint('bb', 'debug')
+    confs.set('DEFAULT', 'timeout', '5')
+    assert confs.getint('aa', 'rate') == 50
+    confs.set('bb', 'debug', 'no')
+    assert confs.getboolean('aa', 'debug') is False
+    assert confs.getint('aa', 'rate', vars={'timeout': '1'}) == 10
+    confs.freeze()
+    assert confs.getint('aa', 'rate') == 50
+    assert confs._zsnapshot.converted['aa'][('rate', False, int)] == 50
+def test_typed_getters_converters():
+    conf = ZConfigParser(converters={'list': lambda v: v.split(',')})
+    aa = conf.ZSEP.join(['aa', 'bb'])
+    conf.read_string('[%s]\n[bb]\nnames=x,y\n' % aa)
+    assert conf.getlist('aa', 'names') == ['x', 'y']
+    assert conf[aa].getlist('names') == ['x', 'y']
+    conf.set('bb', 'names', 'z')
+    assert conf.getlist('aa', 'names') == ['z']
+
+## ------------------------------------------------------------------
+def test_compile_schema():
+    s = '''
+    [DEFAULT]
+    timeout=30
+    [bb.aa]
+    rate=%(timeout)s0
+    [bb]
+    rate=10
+    debug=yes'''
+    confs = getconfs(s)
+    schema = zconfigparser.ZSchema({
+        'rate': int,
+        'timeout': float,
+        'debug': (bool, False),
+        'name': (str, 'noname'),
+    })
+    records = confs.compile_schema(schema)
+    aa = records['aa']
+    assert aa is records[confs.sections()[0]]
+    assert aa == (300, 30.0, True, 'noname')
+    assert aa.rate == 300
+    assert records['bb'].rate == 10
+    with pytest.raises(AttributeError):
+        aa.rate = 1
+    assert list(confs.compile_schema(schema, ['bb'])) == ['bb']
+def test_compile_schema_errors():
+    s = '''
+    [bb.aa]
+    rate=fast
+    [bb]
+    rate=10
+    [cc]
+    debug=maybe'''
+    confs = getconfs(s)
+    schema = zconfigparser.ZSchema({'rate': int, 'debug': (bool, False)})
+    with pytest.raises(zconfigparser.ZValidationError) as excinfo:
+        confs.compile_schema(schema)
+    errors = excinfo.value.errors
+    assert len(errors) == 3
+    assert isinstance(errors[0], zconfigparser.ZConversionError)
+    assert errors[0].value == 'fast'
+    assert isinstance(errors[1], zconfigparser.NoZOptionError)
+    assert isinstance(errors[2], zconfigparser.ZConversionError)
+    with pytest.raises(zconfigparser.ZValidationError) as excinfo:
+        confs.compile_schema(schema, ['dd'])
+    assert isinstance(excinfo.value.errors[0], zconfigparser.NoZSectionError)
+def test_compile_schema_no_value():
+    conf = ZConfigParser(allow_no_value=True)
+    conf.read_string('[aa]\nrate\ndebug\n[bb]\nrate=1\ndebug=on\n')
+    schema = zconfigparser.ZSchema({'rate': int, 'debug': bool})
+    with pytest.raises(zconfigparser.ZValidationError) as excinfo:
+        conf.compile_schema(schema)
+    errors = excinfo.value.errors
+    assert len(errors) == 2
+    assert all(isinstance(e, zconfigparser.ZConversionError) for e in errors)
+    assert [e.option for e in errors] == ['rate', 'debug']
+    assert conf.compile_schema(schema, ['bb'])['bb'] == (1, True)
+def test_compile_schema_circular():
+    s = '''
+    [bb.aa]
+    [aa.bb]
+    [cc]
+    rate=fast'''
+    confs = getconfs(s)
+    schema = zconfigparser.ZSchema({'rate': int})
+    with pytest.raises(zconfigparser.ZValidationError) as excinfo:
+        confs.compile_schema(schema)
+    errors = excinfo.value.errors
+    assert len(errors) == 3
+    assert isinstance(errors[0], zconfigparser.RecursiveZkeyError)
+    assert isinstance(errors[2], zconfigparser.ZConversionError)
+def test_compile_schema_defaults():
+    schema = zconfigparser.ZSchema({
+        'rate': (int, '5'), 'debug': (bool, 'on'), 'name': (str, None)})
+    assert schema.defaults == {'rate': 5, 'debug': True, 'name': None}
+    confs = getconfs('[aa]')
+    assert confs.compile_schema(schema)['aa'] == (5, True, None)
+    with pytest.raises(ValueError):
+        zconfigparser.ZSchema({'rate': (int, 'fast')})
+    with pytest.raises(ValueError):
+        zconfigparser.ZSchema({'debug': (bool, 'maybe')})
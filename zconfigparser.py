@@ -3,14 +3,55 @@
 
 import configparser
 import collections
+import contextlib
+import copy
+import functools
+import hashlib
+import io
+import itertools
+import locale
+import mmap
+import os
+import pickle
+import re
+import struct
+import sys
 
 DEFAULT_ZSEP = ' : '
 REVERSED = ('.',)
 
+_UNSET = configparser._UNSET
+_NOSECTION = object()
+_ZMISSES_MAX = 100000
+_ZSNAPSHOT_VERSION = 2
+_ZMISSING = (None, None, None)  # fingerprint of a removed source file
+# shared memory block layout, by `export_shared` and `SharedZConfig`
+# header: magic, version, number of names, options offset, strings offset
+_ZSHM_HEADER = struct.Struct('<4sIIII')
+# name: string offset and length, options start and count, kind
+_ZSHM_NAME = struct.Struct('<IIIII')
+# option: name offset and length, value offset and length
+_ZSHM_OPTION = struct.Struct('<IIII')
+_ZSHM_MAGIC = b'ZCFG'
+_ZSHM_VERSION = 1
+_ZSHM_SHORT, _ZSHM_LONG, _ZSHM_DEFAULT = 0, 1, 2
+_ZSHM_NONE = 0xFFFFFFFF  # value offset for None values
+# interpolation classes -> syntax characters (in `zcolumn`)
+_ZINTERPOLATION_MARKS = {
+    configparser.BasicInterpolation: '%',
+    configparser.ExtendedInterpolation: '$',
+}
+# section headers in `read_lazy` (bytes version of `SECTCRE`)
+_ZHEADERCRE = re.compile(rb'^\[([^\r\n]+)\]', re.MULTILINE)
+
 
 class ZDictError(Exception):
     """Base class for `ZDict` Exceptions."""
 
+    def __reduce__(self):
+        # rebuild from the constructor arguments (e.g. in other processes)
+        return self.__class__, self._zargs
+
 
 class ZKeyError(ZDictError, KeyError):
     """Raised when no zkey is found."""
@@ -18,6 +59,8 @@ class ZKeyError(ZDictError, KeyError):
     def __init__(self, key):
         msg = "No key %r found in shortnames and longnames." % (key,)
         super().__init__(msg)
+        self.key = key
+        self._zargs = (key,)
 
 
 class DuplicateZKeyError(ZDictError):
@@ -26,6 +69,7 @@ class DuplicateZKeyError(ZDictError):
     def __init__(self, new, old):
         msg = "Duplicate zkeys: %r. %r already exists." % (new, old)
         super().__init__(msg)
+        self._zargs = (new, old)
 
 
 class RecursiveZkeyError(ZDictError):
@@ -37,12 +81,26 @@ class RecursiveZkeyError(ZDictError):
     def __init__(self, key):
         msg = "Recurcive zkey detected: %r." % (key,)
         super().__init__(msg)
+        self._zargs = (key,)
 
 
 class Error(Exception):
     """Base class for `ZConfigParser` Exceptions."""
 
 
+class ZValidationError(Error):
+    """Raised when config-wide validation finds errors.
+
+    All errors found are in ``errors`` attribute.
+    """
+
+    def __init__(self, errors):
+        msg = '%d zsection error(s) found:\n%s' % (
+            len(errors), '\n'.join('    %s' % e for e in errors))
+        super().__init__(msg)
+        self.errors = errors
+
+
 class NoZSectionError(Error, configparser.NoSectionError):
     """Raised when no zsection is found."""
 
@@ -60,6 +118,24 @@ class NoZOptionError(Error, configparser.NoOptionError):
         self.section = section
         self.args = (option, section)
 
+
+class ZConversionError(Error, ValueError):
+    """Raised when an option value can not be converted."""
+
+    def __init__(self, option, section, value, error):
+        super().__init__('Bad zoption value: %r in zsection: %r (%s)' % (
+            option, section, error))
+        self.option = option
+        self.section = section
+        self.value = value
+
+
+class FrozenZConfigError(Error):
+    """Raised when modifying a frozen `ZConfigParser`."""
+
+    def __init__(self):
+        super().__init__('ZConfigParser is frozen')
+
 # not used
 # class DuplicateZSectionError(Error, configparser.DuplicateSectionError):
 #     """Raised when duplicate zsections are found.
@@ -82,6 +158,12 @@ class ZDict(collections.OrderedDict):
         self.ZSEP = kwargs.pop('ZSEP', DEFAULT_ZSEP)
         self.zdata = dict()
         self._zparents = dict()    # used for valification
+        self._zchains = dict()     # key -> tuple of section dicts (cache)
+        self._zdependents = dict()  # shortname -> keys in `_zchains`
+        self._zvalidated = False
+        self._zindex = dict()      # all shortnames and longnames
+        self._zchildren = dict()   # parent shortname -> child shortnames
+        self.zstore = None         # e.g. `_ZSQLiteStore`
         super().__init__(*args, **kwargs)
 
     def _zsplit(self, key):
@@ -97,20 +179,178 @@ class ZDict(collections.OrderedDict):
             return self.zdata[key]
         raise ZKeyError(key)
 
-    def _get_shortnames(self, key, collected=None):
-        if collected is None:
-            collected = []
-        longname = self._zkey(key)
-        shortnames = self._zsplit(longname)
-        shortname = shortnames[0]
-        if shortname in collected:
-            raise RecursiveZkeyError(shortname)
-        collected.append(shortname)
-        if len(shortnames) > 1:
-            for key in shortnames[1:]:
-                self._get_shortnames(key, collected)
+    def _get_shortnames(self, key):
+        # depth-first, but with a stack, not recursion
+        collected = []
+        check = not self._zvalidated
+        seen = set()
+        stack = [key]
+        while stack:
+            longname = self._zkey(stack.pop())
+            shortnames = self._zsplit(longname)
+            shortname = shortnames[0]
+            if check:
+                if shortname in seen:
+                    raise RecursiveZkeyError(shortname)
+                seen.add(shortname)
+            collected.append(shortname)
+            if len(shortnames) > 1:
+                stack.extend(reversed(shortnames[1:]))
         return collected
 
+    def _zparentnames(self, shortname):
+        if shortname in self:
+            return ()
+        if shortname in self._zparents:
+            return self._zparents[shortname][1:]
+        raise ZKeyError(shortname)
+
+    def _ztopological(self):
+        """Return all shortnames, parents before children.
+
+        Iterative depth-first search, so deep chains are not a problem.
+        """
+        order = []
+        done = {}  # shortname -> False (visiting) or True (finished)
+        for longname in self:
+            shortname = self._zsplit(longname)[0]
+            if shortname in done:
+                continue
+            done[shortname] = False
+            stack = [(shortname, iter(self._zparentnames(shortname)))]
+            while stack:
+                shortname, parents = stack[-1]
+                for parent in parents:
+                    state = done.get(parent)
+                    if state is None:
+                        done[parent] = False
+                        parents = iter(self._zparentnames(parent))
+                        stack.append((parent, parents))
+                        break
+                    if state is False:
+                        raise RecursiveZkeyError(parent)
+                else:
+                    stack.pop()
+                    done[shortname] = True
+                    order.append(shortname)
+        return order
+
+    def zresolve(self):
+        """Return a dictionary of shortnames and merged section dictionaries.
+
+        Sections are merged in topological order,
+        each reusing the merged dictionaries of its parents,
+        so the whole work is proportional to the number of options.
+        """
+        resolved = {}
+        for shortname in self._ztopological():
+            parents = self._zparentnames(shortname)
+            if len(parents) > 1 and not self._zvalidated:
+                # only here the same section can be looked-up twice
+                self._get_shortnames(shortname)
+            merged = {}
+            for parent in reversed(parents):
+                merged.update(resolved[parent])
+            merged.update(self._zvalue(self._zkey(shortname)))
+            resolved[shortname] = merged
+        return resolved
+
+    def _zcomponents(self, graph):
+        """Return strongly connected components of the graph.
+
+        Tarjan's algorithm, iterative.
+        Components are returned parents first.
+        """
+        index = {}
+        low = {}
+        stack = []
+        onstack = set()
+        components = []
+        for root in graph:
+            if root in index:
+                continue
+            index[root] = low[root] = len(index)
+            stack.append(root)
+            onstack.add(root)
+            work = [(root, iter(graph[root]))]
+            while work:
+                node, parents = work[-1]
+                for parent in parents:
+                    if parent not in index:
+                        index[parent] = low[parent] = len(index)
+                        stack.append(parent)
+                        onstack.add(parent)
+                        work.append((parent, iter(graph[parent])))
+                        break
+                    if parent in onstack:
+                        low[node] = min(low[node], index[parent])
+                else:
+                    work.pop()
+                    if work:
+                        child = work[-1][0]
+                        low[child] = min(low[child], low[node])
+                    if low[node] == index[node]:
+                        component = []
+                        while True:
+                            member = stack.pop()
+                            onstack.discard(member)
+                            component.append(member)
+                            if member == node:
+                                break
+                        components.append(component)
+        return components
+
+    def zvalidate(self):
+        """Check all sections structure, and return a list of errors.
+
+        It collects all errors, not only the first one.
+        When no error is found, the result is memorized,
+        and zsection lookups skip circular zkey checks afterwards,
+        until the next setting or deletion.
+        """
+        if self._zvalidated:
+            return []
+        errors = []
+        graph = {}
+        broken = set()
+        for longname in self:
+            shortname = self._zsplit(longname)[0]
+            # before skipping, plain [aa] might precede [aa : bb]
+            if shortname != longname and shortname in self:
+                errors.append(DuplicateZKeyError(
+                    self._zparents[shortname], [shortname]))
+            if shortname in graph:
+                continue
+            parents = []
+            for parent in self._zparentnames(shortname):
+                if parent in self or parent in self._zparents:
+                    parents.append(parent)
+                else:
+                    errors.append(ZKeyError(parent))
+                    broken.add(shortname)
+            graph[shortname] = parents
+
+        for component in self._zcomponents(graph):
+            node = component[-1]
+            if len(component) > 1 or node in graph[node]:
+                errors.append(RecursiveZkeyError(node))
+                broken.update(component)
+                continue
+            parents = graph[node]
+            if node in broken or not broken.isdisjoint(parents):
+                broken.add(node)
+                continue
+            if len(parents) > 1:
+                # only here the same section can be looked-up twice
+                try:
+                    self._get_shortnames(node)
+                except RecursiveZkeyError as e:
+                    errors.append(e)
+                    broken.add(node)
+
+        self._zvalidated = not errors
+        return errors
+
     def __setitem__(self, key, value):
         """When setting, the dictionary memorizes zsections structure.
 
@@ -125,30 +365,213 @@ class ZDict(collections.OrderedDict):
                 raise DuplicateZKeyError(shortnames, old)
             self.zdata[shortname] = key
             self._zparents[shortname] = shortnames
+            self._zindex[shortname] = None
+            for parent in shortnames[1:]:
+                self._zchildren.setdefault(parent, {})[shortname] = None
+        self._zindex[key] = None
+        if shortname in self._zdependents:
+            self._zinvalidate(shortname)
+        self._zvalidated = False
+        store = self.zstore
+        if store is not None and not (
+                isinstance(value, _ZStoredSection) and value.zstore is store):
+            store.add(key, shortnames[1:], value)
+            value = _ZStoredSection(store, key)
         super().__setitem__(key, value)
 
+    def zextend(self, records):
+        """Add new sections from (shortname, parent names, options) records.
+
+        Longnames are built by joining names (not splitting),
+        and internal dictionaries are updated directly,
+        much faster than setting sections one by one.
+        Existing sections (and duplicates) raise `DuplicateZKeyError`.
+        """
+        if self.zstore is not None:
+            setitem = self.__setitem__
+        else:
+            setitem = super().__setitem__
+        zsep, reverse = self.ZSEP, self.ZSEP in REVERSED
+        zdata, zparents = self.zdata, self._zparents
+        zindex, zchildren = self._zindex, self._zchildren
+        try:
+            for shortname, parents, options in records:
+                key = shortname
+                if parents:
+                    shortnames = [shortname, *parents]
+                    old = zparents.get(shortname)
+                    if old:
+                        raise DuplicateZKeyError(shortnames, old)
+                    key = zsep.join(
+                        reversed(shortnames) if reverse else shortnames)
+                    zdata[shortname] = key
+                    zparents[shortname] = shortnames
+                    zindex[shortname] = None
+                    for parent in parents:
+                        zchildren.setdefault(parent, {})[shortname] = None
+                if key in self:
+                    raise DuplicateZKeyError([key], [key])
+                zindex[key] = None
+                setitem(key, options)
+        finally:
+            self._zchains.clear()
+            self._zdependents.clear()
+            self._zvalidated = False
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        if self.zstore is not None:
+            self.zstore.remove(key)
+        shortname = self._zsplit(key)[0]
+        if self.zdata.get(shortname) == key:
+            del self.zdata[shortname]
+            for parent in self._zparents.pop(shortname)[1:]:
+                children = self._zchildren[parent]
+                children.pop(shortname, None)
+                if not children:
+                    del self._zchildren[parent]
+            if shortname not in self:
+                del self._zindex[shortname]
+        if key not in self.zdata:
+            del self._zindex[key]
+        if shortname in self._zdependents:
+            self._zinvalidate(shortname)
+        self._zvalidated = False
+
+    def _zinvalidate(self, shortname):
+        """Discard cached chains which include the shortname."""
+        for key in self._zdependents.pop(shortname):
+            self._zchains.pop(key, None)
+
+    def _zvalue(self, longname):
+        """Return a section dictionary, loading a lazy section if any."""
+        value = self[longname]
+        if isinstance(value, _ZLazySection):
+            value = value.zload()
+            super().__setitem__(longname, value)
+        return value
+
     def zget(self, key):
+        """Return a tuple of section dictionaries, in lookup order.
+
+        The result is cached,
+        until a section in the chain is set or deleted.
+        (Options are not copied, so option changes are always seen.)
+        """
+        try:
+            return self._zchains[key]
+        except KeyError:
+            pass
         all_shortnames = self._get_shortnames(key)
         longnames = [self._zkey(s) for s in all_shortnames]
-        values = [self[lo] for lo in longnames]
+        values = tuple(self._zvalue(lo) for lo in longnames)
+        self._zchains[key] = values
+        for shortname in all_shortnames:
+            self._zdependents.setdefault(shortname, set()).add(key)
         return values
 
     def zkeys(self):
-        """Collect all shortnames and longnames.
+        """Return all shortnames and longnames.
 
-        Two dictionary keys are combined (sections and zsections),
-        so key ordering of `OrderedDict` part is not preserved.
+        It is a live view of an index, updated in setting and deletion.
+        (`KeysView` is set-like.)
         """
-        # `KeysView` is subclass of `set`.
-        keys = self.keys() | self.zdata.keys()
-        return collections.abc.KeysView(keys)
+        return self._zindex.keys()
 
     def zcontains(self, key):
-        return key in self.zkeys()
+        return key in self._zindex
+
+    def zchildren(self, key):
+        """Return shortnames of sections directly inheriting the key."""
+        shortname = self._zsplit(key)[0]
+        return list(self._zchildren.get(shortname, ()))
+
+    def zdescendants(self, key):
+        """Return shortnames of sections inheriting the key, at any depth.
+
+        Depth-first, from the reverse index,
+        so the cost is proportional to the result.
+        """
+        shortname = self._zsplit(key)[0]
+        descendants = []
+        seen = {shortname}
+        stack = [shortname]
+        while stack:
+            for child in self._zchildren.get(stack.pop(), ()):
+                if child not in seen:
+                    seen.add(child)
+                    descendants.append(child)
+                    stack.append(child)
+        return descendants
 
     def __repr__(self):
         return super().__repr__()
 
+    def zcompact(self, values=None, shapes=None):
+        """Make names and section dictionaries compact in memory.
+
+        Intern all section names and option names,
+        share identical values (in ``values``, a dictionary, if provided),
+        and replace section dictionaries with `_ZCompactSection`
+        (sharing ``shapes``, if provided).
+        """
+        intern = sys.intern
+        if values is None:
+            values = {}
+        if shapes is None:
+            shapes = {}
+        self.zdata = {intern(k): intern(v) for k, v in self.zdata.items()}
+        self._zparents = {intern(k): [intern(name) for name in v]
+            for k, v in self._zparents.items()}
+        self._zindex = dict.fromkeys(map(intern, self._zindex))
+        self._zchildren = {intern(k): dict.fromkeys(map(intern, v))
+            for k, v in self._zchildren.items()}
+        self._zchains.clear()
+        self._zdependents.clear()
+        items = list(self.items())
+        super().clear()
+        setitem = super().__setitem__
+        for key, options in items:
+            if type(options) is dict:
+                options = _ZCompactSection.from_dict(options, shapes, values)
+            setitem(intern(key), options)
+
+    def copy(self):
+        new = self.__class__(ZSEP=self.ZSEP)
+        new.zstore = self.zstore
+        for key, value in self.items():
+            new[key] = value
+        return new
+
+    __copy__ = copy
+
+    def __reduce__(self):
+        # Keep internal dictionaries, not to build them again in unpickling.
+        # (a store is not pickled, sections are pickled as ``dict``)
+        return (_zdict_restore, (self.__class__, list(self.items()),
+            dict(self.__dict__, zstore=None)))
+
+
+def _zdict_restore(cls, items, state):
+    zdict = cls.__new__(cls)
+    zdict.__dict__.update(state)
+    setitem = collections.OrderedDict.__setitem__
+    for key, value in items:
+        setitem(zdict, key, value)
+    return zdict
+
+
+# A file read by `ZConfigParser.read`, and its parsed data.
+_ZSource = collections.namedtuple('_ZSource',
+    ['encoding', 'fingerprint', 'defaults', 'sections'])
+
+
+# Read-only state of a frozen `ZConfigParser`, swapped as a whole.
+# 'sections' is short and long names -> flattened options,
+# 'zdict' is `ZDict` for the names, 'misses' is for `zlookup`.
+_ZSnapshot = collections.namedtuple('_ZSnapshot',
+    ['sections', 'zdict', 'misses', 'interpolated', 'converted'])
+
 
 class ZDictGen(object):
     """A supplement class needed to create `ZSEP` pre-initialized `ZDict`.
@@ -165,6 +588,461 @@ class ZDictGen(object):
         return ZDict(*self._args, ZSEP=self._ZSEP, **self._kwargs)
 
 
+class _ZLazySection(collections.abc.MutableMapping):
+    """A section dictionary, parsed from a file on first access.
+
+    `ZConfigParser.read_lazy` sets it in place of a section dictionary.
+    ``spans`` are (start, end) byte offsets of the section in ``lazyfile``.
+    """
+
+    def __init__(self, parser, lazyfile, section, spans):
+        self._parser = parser
+        self._lazyfile = lazyfile
+        self._section = section
+        self._spans = spans
+        self._data = None
+
+    @property
+    def zloaded(self):
+        return self._data is not None
+
+    def zload(self):
+        """Parse the section (only once), and return the dictionary."""
+        if self._data is None:
+            self._data = self._parser._zparse_lazy(
+                self._lazyfile, self._section, self._spans)
+            self._lazyfile = None
+        return self._data
+
+    def __getitem__(self, key):
+        return self.zload()[key]
+
+    def __setitem__(self, key, value):
+        self.zload()[key] = value
+
+    def __delitem__(self, key):
+        del self.zload()[key]
+
+    def __iter__(self):
+        return iter(self.zload())
+
+    def __len__(self):
+        return len(self.zload())
+
+    def __contains__(self, key):
+        return key in self.zload()
+
+    def copy(self):
+        return self.zload().copy()
+
+    def __reduce__(self):
+        return (dict, (self.zload(),))
+
+
+class _ZStoredSection(collections.abc.MutableMapping):
+    """A section dictionary, kept in a store (e.g. `_ZSQLiteStore`).
+
+    Options are loaded from the store on each access
+    (the store keeps recently used sections in memory),
+    and changes are written to the store.
+    """
+
+    __slots__ = ('zstore', '_section')
+
+    def __init__(self, store, section):
+        self.zstore = store
+        self._section = section
+
+    def __getitem__(self, key):
+        return self.zstore.load(self._section)[key]
+
+    def __setitem__(self, key, value):
+        self.zstore.set(self._section, key, value)
+
+    def __delitem__(self, key):
+        self.zstore.remove_option(self._section, key)
+
+    def __iter__(self):
+        return iter(self.zstore.load(self._section))
+
+    def __len__(self):
+        return len(self.zstore.load(self._section))
+
+    def __contains__(self, key):
+        return key in self.zstore.load(self._section)
+
+    def copy(self):
+        return self.zstore.load(self._section).copy()
+
+    def __reduce__(self):
+        return (dict, (self.copy(),))
+
+
+class _ZCompactSection(collections.abc.MutableMapping):
+    """A compact section dictionary, made by `ZDict.zcompact`.
+
+    It has a 'shape' (option names -> indexes, a dictionary),
+    shared by all sections with the same option names,
+    and a list of values.
+    """
+
+    __slots__ = ('_shape', '_values', '_shapes')
+
+    def __init__(self, shape, values, shapes):
+        self._shape = shape
+        self._values = values
+        self._shapes = shapes  # option names (tuple) -> shape
+
+    @classmethod
+    def from_dict(cls, options, shapes, values):
+        intern = sys.intern
+        names = tuple(intern(name) for name in options)
+        return cls(cls._get_shape(shapes, names),
+            [values.setdefault(value, value) for value in options.values()],
+            shapes)
+
+    @staticmethod
+    def _get_shape(shapes, names):
+        shape = shapes.get(names)
+        if shape is None:
+            shape = shapes[names] = {name: i for i, name in enumerate(names)}
+        return shape
+
+    def __getitem__(self, key):
+        return self._values[self._shape[key]]
+
+    def __setitem__(self, key, value):
+        i = self._shape.get(key)
+        if i is None:
+            names = tuple(self._shape) + (sys.intern(key),)
+            self._shape = self._get_shape(self._shapes, names)
+            self._values.append(value)
+        else:
+            self._values[i] = value
+
+    def __delitem__(self, key):
+        i = self._shape[key]
+        names = tuple(name for name in self._shape if name != key)
+        self._shape = self._get_shape(self._shapes, names)
+        del self._values[i]
+
+    def __iter__(self):
+        return iter(self._shape)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __contains__(self, key):
+        return key in self._shape
+
+    def copy(self):
+        return dict(zip(self._shape, self._values))
+
+    def __reduce__(self):
+        return (dict, (self.copy(),))
+
+
+_ZSQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS sections (name TEXT PRIMARY KEY);
+CREATE TABLE IF NOT EXISTS parents (
+    section TEXT, position INTEGER, parent TEXT,
+    PRIMARY KEY (section, position));
+CREATE TABLE IF NOT EXISTS options (
+    section TEXT, option TEXT, value TEXT, UNIQUE (section, option));
+"""
+
+
+class _ZSQLiteStore(object):
+    """Sections (longnames), their parents and options, in a SQLite file.
+
+    Recently loaded section dictionaries are cached (LRU).
+    Each change is committed, unless in `batch`.
+    """
+
+    def __init__(self, path, cache_size=1024):
+        import sqlite3
+
+        self._conn = sqlite3.connect(
+            path, isolation_level=None, check_same_thread=False)
+        self._conn.executescript(_ZSQLITE_SCHEMA)
+        self._cache = collections.OrderedDict()
+        self._cache_size = cache_size
+        self._batch = 0
+
+    @contextlib.contextmanager
+    def batch(self):
+        """Commit changes at once, at the end (can be nested)."""
+        if self._batch == 0:
+            self._conn.execute('BEGIN')
+        self._batch += 1
+        try:
+            yield
+        finally:
+            self._batch -= 1
+            if self._batch == 0:
+                self._conn.execute('COMMIT')
+
+    def meta(self):
+        return dict(self._conn.execute('SELECT key, value FROM meta'))
+
+    def set_meta(self, key, value):
+        self._conn.execute(
+            'INSERT OR REPLACE INTO meta VALUES (?, ?)', (key, value))
+
+    def names(self):
+        return [row[0] for row in self._conn.execute(
+            'SELECT name FROM sections ORDER BY rowid')]
+
+    def load(self, section):
+        cache = self._cache
+        options = cache.get(section)
+        if options is not None:
+            cache.move_to_end(section)
+            return options
+        options = dict(self._conn.execute(
+            'SELECT option, value FROM options '
+            'WHERE section = ? ORDER BY rowid', (section,)))
+        cache[section] = options
+        if len(cache) > self._cache_size:
+            cache.popitem(last=False)
+        return options
+
+    def add(self, section, parents, options):
+        """Add a section (replacing the old one, if any)."""
+        with self.batch():
+            self.remove(section)
+            execute, executemany = self._conn.execute, self._conn.executemany
+            execute('INSERT INTO sections VALUES (?)', (section,))
+            executemany('INSERT INTO parents VALUES (?, ?, ?)',
+                [(section, i, parent) for i, parent in enumerate(parents)])
+            executemany('INSERT INTO options VALUES (?, ?, ?)',
+                [(section, option, value)
+                    for option, value in options.items()])
+
+    def remove(self, section):
+        self._cache.pop(section, None)
+        with self.batch():
+            for table in ('sections WHERE name', 'parents WHERE section',
+                    'options WHERE section'):
+                self._conn.execute(
+                    'DELETE FROM %s = ?' % table, (section,))
+
+    def set(self, section, option, value):
+        self._conn.execute(
+            'INSERT INTO options VALUES (?, ?, ?) ON CONFLICT '
+            '(section, option) DO UPDATE SET value = excluded.value',
+            (section, option, value))
+        options = self._cache.get(section)
+        if options is not None:
+            options[option] = value
+
+    def remove_option(self, section, option):
+        cursor = self._conn.execute(
+            'DELETE FROM options WHERE section = ? AND option = ?',
+            (section, option))
+        if cursor.rowcount == 0:
+            raise KeyError(option)
+        options = self._cache.get(section)
+        if options is not None:
+            options.pop(option, None)
+
+    def close(self):
+        self._cache.clear()
+        self._conn.close()
+
+
+# An opened (memory-mapped) file, for `_ZLazySection`.
+_ZLazyFile = collections.namedtuple('_ZLazyFile',
+    ['filename', 'encoding', 'data'])
+
+
+class _ZProxies(dict):
+    """Section proxies of `ZConfigParser`, created on first access.
+
+    Creating `SectionProxy` is not cheap,
+    and `ConfigParser` checks section existence before accessing this.
+    """
+
+    def __init__(self, parser, *args):
+        self._parser = parser
+        super().__init__(*args)
+
+    def __missing__(self, key):
+        proxy = self[key] = configparser.SectionProxy(self._parser, key)
+        return proxy
+
+    def __delitem__(self, key):
+        self.pop(key, None)
+
+
+class ZExtendedInterpolation(configparser.ExtendedInterpolation):
+    """`ExtendedInterpolation` for zsections.
+
+    In ``${section:option}``, section can be a long name
+    (including ``':'``, the last ``':'`` separates the option),
+    and nested references are resolved in the zsection,
+    with inherited options.
+    """
+
+    def _interpolate_some(self, parser, option, accum, rest, section, map,
+                          depth):
+        """Override `ExtendedInterpolation`'s method.
+
+        The code is the same as the original,
+        except for splitting the reference (``path``),
+        and the map for nested references (`_unify_values`).
+        """
+        rawval = parser.get(section, option, raw=True, fallback=rest)
+        if depth > configparser.MAX_INTERPOLATION_DEPTH:
+            raise configparser.InterpolationDepthError(
+                option, section, rawval)
+        while rest:
+            p = rest.find("$")
+            if p < 0:
+                accum.append(rest)
+                return
+            if p > 0:
+                accum.append(rest[:p])
+                rest = rest[p:]
+            # p is no longer used
+            c = rest[1:2]
+            if c == "$":
+                accum.append("$")
+                rest = rest[2:]
+            elif c == "{":
+                m = self._KEYCRE.match(rest)
+                if m is None:
+                    raise configparser.InterpolationSyntaxError(
+                        option, section,
+                        "bad interpolation variable reference %r" % rest)
+                path = m.group(1)
+                rest = rest[m.end():]
+                sect, colon, opt = path.rpartition(':')
+                try:
+                    if not colon:
+                        sect = section
+                        opt = parser.optionxform(opt)
+                        v = map[opt]
+                    else:
+                        opt = parser.optionxform(opt)
+                        v = parser.get(sect, opt, raw=True)
+                except (KeyError, configparser.NoSectionError,
+                        configparser.NoOptionError):
+                    raise configparser.InterpolationMissingOptionError(
+                        option, section, rawval, path) from None
+                if "$" in v:
+                    self._interpolate_some(parser, opt, accum, v, sect,
+                        parser._unify_values(sect, None), depth + 1)
+                else:
+                    accum.append(v)
+            else:
+                raise configparser.InterpolationSyntaxError(
+                    option, section,
+                    "'$' must be followed by '$' or '{', "
+                    "found: %r" % (rest,))
+
+
+_ZINTERPOLATION_MARKS[ZExtendedInterpolation] = '$'
+
+# interpolations of which syntax `interpolate_all` knows
+_ZINTERPOLATION_SYNTAX = (
+    configparser.BasicInterpolation,
+    ZExtendedInterpolation,
+)
+
+# interpolations of which `get` results are cached
+_ZCACHED_INTERPOLATIONS = (
+    configparser.BasicInterpolation,
+    configparser.ExtendedInterpolation,
+    ZExtendedInterpolation,
+)
+
+# interpolations of which converted values (`getint` etc.) are cached
+_ZCONVERTED_INTERPOLATIONS = (configparser.Interpolation,) + (
+    _ZCACHED_INTERPOLATIONS)
+
+
+class _ZSectionProxy(configparser.SectionProxy):
+    """A section proxy for a zsection, with inherited options."""
+
+    def __getitem__(self, key):
+        try:
+            return self._parser.get(self._name, key)
+        except configparser.NoOptionError:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        return self._parser.has_zoption(self._name, key)
+
+    def _options(self):
+        return self._parser.zoptions(self._name)
+
+
+class _ZSectionViews(collections.abc.Mapping):
+    """Zsection views of `ZConfigParser` (`ZConfigParser.z`)."""
+
+    def __init__(self, parser):
+        self._parser = parser
+
+    def __getitem__(self, section):
+        parser = self._parser
+        if section != parser.default_section:
+            zdict = parser._zdict()
+            if not zdict.zcontains(section):
+                raise KeyError(section)
+            # as long names, to set and delete options in the section
+            section = zdict._zkey(section)
+        return _ZSectionProxy(parser, section)
+
+    def __iter__(self):
+        return iter(self._parser.zsections())
+
+    def __len__(self):
+        return len(self._parser.zsections())
+
+
+class ZSchema(object):
+    """Option names, types and defaults, for `compile_schema`.
+
+    ``options`` is option names -> types (converters, e.g. ``int``),
+    or (type, default) tuples. Options without defaults are required.
+    ``bool`` converts as `getboolean` does.
+    String defaults are converted as option values
+    (raising ``ValueError`` here if they can't),
+    other defaults (e.g. None) are used as is.
+
+    Each section is compiled into a ``record``,
+    a ``namedtuple`` class with the option names as attributes
+    (so they must be valid identifiers).
+    """
+
+    def __init__(self, options, name='ZRecord'):
+        self.converters = {}
+        self.defaults = {}
+        for option, spec in options.items():
+            if isinstance(spec, tuple):
+                spec, default = spec
+                if isinstance(default, str):
+                    default = self._zconvert(option, spec, default)
+                self.defaults[option] = default
+            self.converters[option] = spec
+        self.record = collections.namedtuple(name, list(options))
+
+    @staticmethod
+    def _zconvert(option, conv, value):
+        try:
+            if conv is bool:
+                states = configparser.RawConfigParser.BOOLEAN_STATES
+                if value.lower() not in states:
+                    raise ValueError('Not a boolean: %s' % value)
+                return states[value.lower()]
+            return conv(value)
+        except (ValueError, TypeError) as e:
+            raise ValueError('Bad default of %r: %r (%s)'
+                % (option, value, e)) from None
+
+
 class ZConfigParser(configparser.ConfigParser):
     """ConfigParser, plus some section inheritance function.
 
@@ -177,24 +1055,295 @@ class ZConfigParser(configparser.ConfigParser):
         if len(args) > 1 or 'dict_type' in kwargs:
             msg = ("you can not assign 'dict_type' in ZConfigParser")
             raise ValueError(msg)
+        # to build the same parsers in other processes (`read_parallel`)
+        self._zinit = (args, dict(kwargs))
         self.ZSEP = kwargs.pop('ZSEP', DEFAULT_ZSEP)
+        self._zsnapshot = None
+        self._zmisses = {}   # section -> options not found
+        self._zkeysets = {}  # section -> all option names (cache)
+        self._zinterpolated = {}  # section -> interpolated values (cache)
+        self._zconverted = {}  # section -> converted values (cache)
+        self._zsources = {}  # filename -> `_ZSource`
         zd = ZDictGen(ZSEP=self.ZSEP)
         super().__init__(*args, dict_type=zd, **kwargs)
+        # Only `_sections` needs `ZDict`, other dictionaries are plain.
+        self._dict = dict
+        self._defaults = dict(self._defaults)
+        self._proxies = _ZProxies(self, self._proxies)
 
-    def get(self, section, option, **kwargs):
+    def get(self, section, option, *, raw=False, vars=None,
+            fallback=_UNSET):
         """Override `ConfigParser`'s method.
 
-        `ZConfigParser` only wraps Exceptions in `get`.
-        Other 'get' (`getint` etc.)
-        might leak (raise) `ConfigParser`'s Exceptions.
+        Exceptions are wrapped
+        (`NoZSectionError` and `NoZOptionError`).
+        Other 'get' (`getint` etc.) use this method.
         """
+        if not vars and (raw or type(self._interpolation)
+                is configparser.Interpolation):
+            return self._zget_raw(section, option, fallback)
+        if not vars and type(self._interpolation) in _ZCACHED_INTERPOLATIONS:
+            return self._zget_interpolated(section, option, fallback)
         try:
-            return super().get(section, option, **kwargs)
+            return super().get(section, option,
+                raw=raw, vars=vars, fallback=fallback)
         except configparser.NoSectionError:
             raise NoZSectionError(section)
         except configparser.NoOptionError:
             raise NoZOptionError(option, section)
 
+    def _zget_raw(self, section, option, fallback):
+        """Look up section dictionaries directly.
+
+        The fast path of `get` (no interpolation and no ``vars``),
+        without building a ``ChainMap``.
+        """
+        value = self._zfind(
+            section, self.optionxform(option), self._zsnapshot)
+        if value is _UNSET or value is _NOSECTION:
+            if fallback is not _UNSET:
+                return fallback
+            if value is _NOSECTION:
+                raise NoZSectionError(section)
+            raise NoZOptionError(option, section)
+        return value
+
+    def _zget_interpolated(self, section, option, fallback):
+        """Return an interpolated value, cached until modification.
+
+        The path of `get` for standard interpolations (and no ``vars``).
+        """
+        key = self.optionxform(option)
+        snapshot = self._zsnapshot
+        if snapshot is None:
+            cache = self._zinterpolated
+        else:
+            cache = snapshot.interpolated
+        values = cache.get(section)
+        if values is not None and key in values:
+            return values[key]
+        value = self._zfind(section, key, snapshot)
+        if value is _UNSET or value is _NOSECTION:
+            return self._zget_raw(section, option, fallback)
+        if value is not None:
+            value = self._interpolation.before_get(self, section, key, value,
+                self._zunified(section, snapshot))
+        if values is None:
+            if len(cache) >= _ZMISSES_MAX:
+                cache.clear()
+            values = cache[section] = {}
+        values[key] = value
+        return value
+
+    def _get_conv(self, section, option, conv, *, raw=False, vars=None,
+            fallback=_UNSET, **kwargs):
+        """Override `RawConfigParser`'s method.
+
+        It is used by `getint`, `getfloat`, `getboolean`
+        and custom ``converters``.
+        Converted values are cached until modification
+        (if no ``vars`` and the interpolation is standard).
+        """
+        if vars or kwargs or not (raw or type(self._interpolation)
+                in _ZCONVERTED_INTERPOLATIONS):
+            return super()._get_conv(section, option, conv,
+                raw=raw, vars=vars, fallback=fallback, **kwargs)
+        snapshot = self._zsnapshot
+        if snapshot is None:
+            cache = self._zconverted
+        else:
+            cache = snapshot.converted
+        key = (self.optionxform(option), raw, conv)
+        values = cache.get(section)
+        if values is not None and key in values:
+            return values[key]
+        try:
+            value = self.get(section, option, raw=raw)
+        except (configparser.NoSectionError, configparser.NoOptionError):
+            if fallback is _UNSET:
+                raise
+            return fallback
+        value = conv(value)
+        if values is None:
+            if len(cache) >= _ZMISSES_MAX:
+                cache.clear()
+            values = cache[section] = {}
+        values[key] = value
+        return value
+
+    def _zfind(self, section, key, snapshot=None):
+        """Return a raw value, or ``_NOSECTION`` or ``_UNSET`` if not found.
+
+        ``key`` is an option name already transformed by `optionxform`.
+        """
+        if snapshot is not None:
+            sectiondict = snapshot.sections.get(section)
+            if sectiondict is None:
+                return _NOSECTION
+            return sectiondict.get(key, _UNSET)
+        try:
+            sectiondicts = self._sections.zget(section)
+        except ZKeyError:
+            if section != self.default_section:
+                return _NOSECTION
+            sectiondicts = ()
+        for sectiondict in sectiondicts:
+            if key in sectiondict:
+                return sectiondict[key]
+        return self._defaults.get(key, _UNSET)
+
+    def zlookup(self, section, option, default=None, *, raw=False):
+        """Return an option value in a zsection, or ``default`` if not found.
+
+        Unlike `get`, it doesn't raise Exceptions
+        for missing sections and options.
+        Misses are memorized (until modification),
+        so repeated misses are cheap.
+        """
+        key = self.optionxform(option)
+        snapshot = self._zsnapshot
+        allmisses = self._zmisses if snapshot is None else snapshot.misses
+        misses = allmisses.get(section)
+        if misses is not None and key in misses:
+            return default
+        value = self._zfind(section, key, snapshot)
+        if value is _UNSET or value is _NOSECTION:
+            if misses is None:
+                if len(allmisses) >= _ZMISSES_MAX:
+                    allmisses.clear()
+                misses = allmisses[section] = set()
+            misses.add(key)
+            return default
+        if raw or value is None:
+            return value
+        d = self._unify_values(section, None)
+        return self._interpolation.before_get(self, section, key, value, d)
+
+    def zcolumn(self, option, sections=None, default=None, *,
+            raw=False, lists=False):
+        """Return values of an option in many zsections at once.
+
+        ``sections`` are short or long names (default: all shortnames).
+        Return a dictionary of sections -> values
+        (``default`` if not found),
+        or if ``lists`` is True, a tuple of two lists (sections and values).
+
+        Each section is looked up in its cached chain of dictionaries
+        (shared by `get`), without the overheads of `get` calls,
+        so it is much faster than calling `get` for each section.
+        """
+        key = self.optionxform(option)
+        snapshot = self._zsnapshot
+        if sections is None:
+            zdict = self._sections if snapshot is None else snapshot.zdict
+            sections = [zdict._zsplit(longname)[0] for longname in zdict]
+        else:
+            sections = list(sections)
+        if snapshot is None:
+            values = self._zcolumn(key, sections)
+        else:
+            values = [snapshot.sections.get(section, _NOSECTION)
+                for section in sections]
+            for i, options in enumerate(values):
+                if options is _NOSECTION:
+                    raise NoZSectionError(sections[i])
+                values[i] = options.get(key, _UNSET)
+
+        plain = type(self._interpolation) is configparser.Interpolation
+        if not (raw or plain):
+            # values without the syntax are as is, in standard ones
+            mark = _ZINTERPOLATION_MARKS.get(type(self._interpolation))
+            for i, (section, value) in enumerate(zip(sections, values)):
+                if value is _UNSET or value is None:
+                    continue
+                if mark is None or mark in value:
+                    values[i] = self._interpolation.before_get(self,
+                        section, key, value, self._zunified(section, snapshot))
+        values = [default if value is _UNSET else value for value in values]
+        if lists:
+            return sections, values
+        return dict(zip(sections, values))
+
+    def _zcolumn(self, key, sections):
+        # `_zfind` for many sections, inlined
+        zget = self._sections.zget
+        default = self._defaults.get(key, _UNSET)
+        values = []
+        for section in sections:
+            try:
+                sectiondicts = zget(section)
+            except ZKeyError:
+                if section != self.default_section:
+                    raise NoZSectionError(section)
+                sectiondicts = ()
+            for sectiondict in sectiondicts:
+                if key in sectiondict:
+                    values.append(sectiondict[key])
+                    break
+            else:
+                values.append(default)
+        return values
+
+    def zoptions(self, section):
+        """Return a list of all option names in a zsection.
+
+        They include inherited options and defaults.
+        """
+        return list(self._zoptionnames(section))
+
+    def zitems(self, section, raw=False, vars=None):
+        """Return a list of all (name, value) pairs in a zsection.
+
+        They include inherited options and defaults,
+        and values are interpolated (unless ``raw`` is True), as `get`.
+        """
+        names = self._zoptionnames(section)
+        d = self._unify_values(section, vars)
+        if vars:
+            names = dict.fromkeys(itertools.chain(names, d.maps[0]))
+        plain = type(self._interpolation) is configparser.Interpolation
+        if raw or plain:
+            return [(name, d[name]) for name in names]
+        before_get = self._interpolation.before_get
+        items = []
+        for name in names:
+            value = d[name]
+            if value is not None:
+                value = before_get(self, section, name, value, d)
+            items.append((name, value))
+        return items
+
+    def _zoptionnames(self, section):
+        """Return all option names in a zsection (cached until modified)."""
+        snapshot = self._zsnapshot
+        if snapshot is not None:
+            try:
+                return snapshot.sections[section].keys()
+            except KeyError:
+                raise NoZSectionError(section)
+        names = self._zkeysets.get(section)
+        if names is None:
+            try:
+                sectiondicts = self._sections.zget(section)
+            except ZKeyError:
+                if section != self.default_section:
+                    raise NoZSectionError(section)
+                sectiondicts = ()
+            names = tuple(dict.fromkeys(
+                itertools.chain(*sectiondicts, self._defaults)))
+            self._zkeysets[section] = names
+        return names
+
+    @property
+    def z(self):
+        """Return zsection views, as ``config.z[section]``.
+
+        A view is a section proxy (as ``config[section]``),
+        but with all options in the zsection (inherited options included).
+        Sections are short or long names.
+        """
+        return _ZSectionViews(self)
+
     def _unify_values(self, section, vars):
         """Override `ConfigParser`'s method.
 
@@ -203,6 +1352,16 @@ class ZConfigParser(configparser.ConfigParser):
         just inserting dictionaries list,
         instead of a dictionary (sectiondict).
         """
+        snapshot = self._zsnapshot
+        if snapshot is not None:
+            try:
+                sectiondict = snapshot.sections[section]
+            except KeyError:
+                raise NoZSectionError(section)
+            if not vars:
+                return sectiondict
+            return collections.ChainMap(self._zvardict(vars), sectiondict)
+
         sectiondict = [{}]
         try:
             sectiondict = self._sections.zget(section)
@@ -210,26 +1369,1360 @@ class ZConfigParser(configparser.ConfigParser):
             if section != self.default_section:
                 raise NoZSectionError(section)
 
+        vardict = self._zvardict(vars)
+        return collections.ChainMap(vardict, *sectiondict, self._defaults)
+
+    def _zunified(self, section, snapshot):
+        """Return `_unify_values` (no ``vars``) of an already taken snapshot.
+
+        Not to mix two states, when `reload` swaps snapshots meanwhile.
+        """
+        if snapshot is None:
+            return self._unify_values(section, None)
+        try:
+            return snapshot.sections[section]
+        except KeyError:
+            raise NoZSectionError(section)
+
+    def _zvardict(self, vars):
         vardict = {}
         if vars:
             for key, value in vars.items():
                 if value is not None:
                     value = str(value)
                 vardict[self.optionxform(key)] = value
-        return collections.ChainMap(vardict, *sectiondict, self._defaults)
+        return vardict
+
+    def freeze(self):
+        """Flatten all zsections, and make the config read-only.
+
+        Each short and long section name gets one plain dictionary,
+        merging inherited options and defaults.
+        So `get` becomes a single dictionary lookup.
+
+        Errors in sections structure are raised here, not in `get`.
+        After this, modifying methods raise `FrozenZConfigError`.
+        Only `reload` can change the config,
+        building a new state aside and swapping it at once.
+        """
+        self._zsnapshot = self._zsnap()
+
+    def compact(self):
+        """Make sections compact in memory.
+
+        Section names and option names are interned,
+        identical values are shared,
+        and each section keeps only a list of values,
+        sharing option names with other sections of the same options.
+        Section proxies are dropped (created again on access).
+
+        The config works as before, but lookups are a bit slower.
+        Sections added later are not compact (call it again).
+        """
+        self._zmodify()
+        values, shapes = {}, {}
+
+        def compact_defaults(defaults):
+            return {sys.intern(k): values.setdefault(v, v)
+                for k, v in defaults.items()}
+
+        self._sections.zcompact(values, shapes)
+        # `ConfigParser._read` creates section proxies eagerly
+        self._proxies = _ZProxies(self)
+        if type(self._defaults) is dict:
+            self._defaults = compact_defaults(self._defaults)
+        # sections of files for `reload` (the same values mostly)
+        for filename, source in self._zsources.items():
+            if isinstance(source.sections, ZDict):
+                source.sections.zcompact(values, shapes)
+            self._zsources[filename] = source._replace(
+                defaults=compact_defaults(source.defaults))
+
+    def _zsnap(self):
+        sections = self.resolve_all()
+        for shortname, longname in self._sections.zdata.items():
+            sections[longname] = sections[shortname]
+        sections[self.default_section] = dict(self._defaults)
+        return _ZSnapshot(sections, self._sections, {}, {}, {})
+
+    def resolve_all(self):
+        """Return a dictionary of all section shortnames and their options.
+
+        Each value is a new dictionary,
+        merging inherited options and defaults (raw values).
+        Parents are resolved first and reused by children,
+        so it is much faster than `get` for all options.
+        """
+        try:
+            resolved = self._sections.zresolve()
+        except ZKeyError as e:
+            raise NoZSectionError(e.key)
+        if self._defaults:
+            for shortname, merged in resolved.items():
+                resolved[shortname] = {**self._defaults, **merged}
+        return resolved
+
+    def interpolate_all(self):
+        """Return a dictionary of all section shortnames and their options.
+
+        The same as `resolve_all`, but values are interpolated.
+        All errors are raised at once, in `ZValidationError`
+        (missing references, syntax errors and too deep (or circular)
+        references, as `get` would raise).
+
+        For ``BasicInterpolation`` and `ZExtendedInterpolation`,
+        references of all values are checked as a dependency graph,
+        and each value is interpolated only once.
+        The results are used by `get` (until modification).
+        """
+        sections = self.resolve_all()
+        sections[self.default_section] = dict(self._defaults)
+        interpolation = type(self._interpolation)
+        if interpolation is configparser.Interpolation:
+            return sections
+        if interpolation in _ZINTERPOLATION_SYNTAX:
+            expanded, errors = self._zexpand(sections)
+            snapshot = self._zsnapshot
+            cache = self._zinterpolated if snapshot is None else (
+                snapshot.interpolated)
+            zdata = self._sections.zdata
+            for shortname, values in expanded.items():
+                cache[shortname] = dict(values)
+                if shortname in zdata:
+                    cache[zdata[shortname]] = cache[shortname]
+        else:
+            expanded, errors = {}, []
+            for section, options in sections.items():
+                expanded[section] = values = {}
+                for option in options:
+                    try:
+                        values[option] = self.get(section, option)
+                    except configparser.InterpolationError as e:
+                        errors.append(e)
+        if errors:
+            raise ZValidationError(errors)
+        return expanded
+
+    def _zexpand(self, sections):
+        """Interpolate all values, following references in topological order.
+
+        Return a dictionary as `interpolate_all`
+        (without options having errors), and a list of errors.
+        """
+        MAX = configparser.MAX_INTERPOLATION_DEPTH
+        mark = _ZINTERPOLATION_MARKS[type(self._interpolation)]
+        zdict = self._sections
+        errors = []
+        parsed = {}   # (section, option) -> parts (strings and nodes)
+        results = {}  # (section, option) -> (value, depth), or None (error)
+
+        def parse(node):
+            section, option = node
+            value = sections[section][option]
+            if value is None or mark not in value:
+                return [value]
+            try:
+                parts = self._zparse_syntax(value, section, option)
+            except configparser.InterpolationError as e:
+                errors.append(e)
+                return None
+            for i, part in enumerate(parts):
+                if type(part) is not tuple:
+                    continue
+                ref, reference = part[:2], part[2]
+                if ref[0] not in sections:
+                    try:
+                        ref = zdict._zsplit(zdict._zkey(ref[0]))[0], ref[1]
+                    except ZKeyError:
+                        ref = None
+                if ref is None or sections[ref[0]].get(ref[1]) is None:
+                    errors.append(
+                        configparser.InterpolationMissingOptionError(
+                            option, section, value, reference))
+                    return None
+                parts[i] = ref
+            return parts
+
+        for start in ((section, option)
+                for section, options in sections.items()
+                for option in options):
+            if start in results:
+                continue
+            stack = [start]
+            active = {start}
+            while stack:
+                node = stack[-1]
+                if node not in parsed:
+                    parsed[node] = parse(node)
+                parts = parsed[node]
+                result = None
+                pending = None
+                if parts is not None:
+                    for part in parts:
+                        if type(part) is tuple and part not in results:
+                            pending = part
+                            break
+                if pending is not None and pending not in active:
+                    stack.append(pending)
+                    active.add(pending)
+                    continue
+                section, option = node
+                value = sections[section][option]
+                if pending is not None:  # circular references
+                    errors.append(configparser.InterpolationDepthError(
+                        option, section, value))
+                elif parts is not None:
+                    result = self._zjoin_parts(parts, results, sections, mark)
+                    if result is not None and result[1] > MAX:
+                        errors.append(configparser.InterpolationDepthError(
+                            option, section, value))
+                        result = None
+                results[node] = result
+                stack.pop()
+                active.discard(node)
+
+        expanded = {section: {} for section in sections}
+        for (section, option), result in results.items():
+            if result is not None:
+                expanded[section][option] = result[0]
+        return expanded, errors
+
+    @staticmethod
+    def _zjoin_parts(parts, results, sections, mark):
+        """Return (value, depth) of interpolation parts, or None (error)."""
+        if len(parts) == 1 and type(parts[0]) is not tuple:
+            return parts[0], 1
+        values = []
+        depth = 1
+        for part in parts:
+            if type(part) is not tuple:
+                values.append(part)
+                continue
+            result = results[part]
+            if result is None:
+                return None
+            values.append(result[0])
+            # `get` interpolates again, only if the value has the syntax
+            if mark in sections[part[0]][part[1]]:
+                depth = max(depth, result[1] + 1)
+        return ''.join(values), depth
+
+    def _zparse_syntax(self, value, section, option):
+        """Split a raw value into strings and references.
+
+        A reference is (section, option, reference string).
+        It follows ``_interpolate_some`` of the interpolation.
+        """
+        interpolation = self._interpolation
+        mark = _ZINTERPOLATION_MARKS[type(interpolation)]
+        parts = []
+        rest = value
+        while rest:
+            p = rest.find(mark)
+            if p < 0:
+                parts.append(rest)
+                break
+            if p > 0:
+                parts.append(rest[:p])
+                rest = rest[p:]
+            c = rest[1:2]
+            if c == mark:
+                parts.append(mark)
+                rest = rest[2:]
+                continue
+            if c != ('(' if mark == '%' else '{'):
+                raise configparser.InterpolationSyntaxError(option, section,
+                    "'%s' must be followed by '%s' or '%s', found: %r" % (
+                        mark, mark, '(' if mark == '%' else '{', rest))
+            m = interpolation._KEYCRE.match(rest)
+            if m is None:
+                raise configparser.InterpolationSyntaxError(option, section,
+                    'bad interpolation variable reference %r' % rest)
+            reference = m.group(1)
+            rest = rest[m.end():]
+            sect, colon, opt = reference.rpartition(':')
+            if mark == '%' or not colon:
+                sect, opt = section, reference
+            parts.append((sect, self.optionxform(opt), reference))
+        return parts
+
+    def _zmodify(self, section=None):
+        """Check frozen state, and discard caches, before modification.
+
+        ``section`` is a section (long) name to modify,
+        or None (all sections might be modified).
+        """
+        if self._zsnapshot is not None:
+            raise FrozenZConfigError()
+        # values might refer to any section, in `ExtendedInterpolation`
+        crossref = isinstance(
+            self._interpolation, configparser.ExtendedInterpolation)
+        if section is None or section == self.default_section:
+            self._zmisses.clear()
+            self._zkeysets.clear()
+            self._zinterpolated.clear()
+            self._zconverted.clear()
+        else:
+            for name in self._zaffected(section):
+                self._zmisses.pop(name, None)
+                self._zkeysets.pop(name, None)
+                self._zinterpolated.pop(name, None)
+                self._zconverted.pop(name, None)
+            if crossref:
+                self._zinterpolated.clear()
+                self._zconverted.clear()
+
+    def _zaffected(self, section):
+        """Return section names whose lookups depend on the section.
+
+        They are short and long names of the section and its descendants.
+        """
+        zdict = self._sections
+        shortname = zdict._zsplit(section)[0]
+        names = {section}
+        for short in [shortname] + zdict.zdescendants(shortname):
+            names.add(short)
+            if short in zdict.zdata:
+                names.add(zdict.zdata[short])
+        return names
+
+    def _read(self, fp, fpname):
+        self._zmodify()
+        if self._sections.zstore is None:
+            super()._read(fp, fpname)
+            return
+        # `ConfigParser` fills section dictionaries after setting them,
+        # so parse separately, and set the results to the store.
+        scratch = self._zscratch()
+        try:
+            scratch._read(fp, fpname)
+        finally:
+            self._zmerge(scratch._defaults, scratch._sections)
+
+    def read_dict(self, dictionary, source='<dict>'):
+        self._zmodify()
+        with self._zbatch():
+            super().read_dict(dictionary, source=source)
+
+    def __setitem__(self, key, value):
+        # check frozen state before the section is cleared
+        self._zmodify(key)
+        super().__setitem__(key, value)
+
+    def _zbatch(self):
+        """Return a context to commit changes to a store at once."""
+        store = self._sections.zstore
+        if store is None:
+            return contextlib.nullcontext()
+        return store.batch()
+
+    def add_section(self, section):
+        self._zmodify(section)
+        super().add_section(section)
+
+    def remove_section(self, section):
+        self._zmodify(section)
+        return super().remove_section(section)
+
+    def set(self, section, option, value=None):
+        self._zmodify(section)
+        super().set(section, option, value)
+
+    def remove_option(self, section, option):
+        self._zmodify(section)
+        return super().remove_option(section, option)
+
+    def read(self, filenames, encoding=None):
+        """Override `ConfigParser`'s method.
+
+        Each file is parsed separately and merged (the result is the same),
+        and remembered for `reload`.
+        """
+        if isinstance(filenames, (str, bytes, os.PathLike)):
+            filenames = [filenames]
+        encoding = io.text_encoding(encoding)
+        read_ok = []
+        for filename in filenames:
+            parsed = self._zparsefile(filename, encoding)
+            self._zmergefile(parsed, encoding, read_ok)
+        return read_ok
+
+    def read_parallel(self, filenames, encoding=None, workers=None):
+        """Read and parse files in processes, and merge them in order.
+
+        The result is the same as `read`,
+        including which files are read, overrides and errors.
+        ``workers`` is the maximum number of processes
+        (``concurrent.futures.ProcessPoolExecutor``'s default if None).
+
+        Each process builds a parser with the same constructor arguments
+        (and ``optionxform``), so they must be picklable.
+        With one worker (or one CPU), files are just parsed in this process.
+        """
+        self._zmodify()
+        if isinstance(filenames, (str, bytes, os.PathLike)):
+            filenames = [filenames]
+        filenames = list(filenames)
+        encoding = io.text_encoding(encoding)
+        workers = workers or os.cpu_count() or 1
+        if workers < 2 or len(filenames) < 2:
+            parsed = [self._zparsefile(filename, encoding)
+                for filename in filenames]
+        else:
+            parsed = self._zparse_processes(filenames, encoding, workers)
+        read_ok = []
+        for p in parsed:
+            self._zmergefile(p, encoding, read_ok)
+        return read_ok
+
+    def _zparse_processes(self, filenames, encoding, workers):
+        import concurrent.futures
+
+        initargs = (type(self), self._zinit, vars(self).get('optionxform'))
+        # a few chunks for each process, not to pass files one by one
+        chunksize = max(len(filenames) // (workers * 4), 1)
+        with concurrent.futures.ProcessPoolExecutor(workers,
+                initializer=_zworker_init, initargs=initargs) as executor:
+            return list(executor.map(
+                functools.partial(_zworker_parse, encoding=encoding),
+                filenames, chunksize=chunksize))
+
+    def _zparsefile(self, filename, encoding):
+        """Read and parse a file with a scratch parser.
+
+        Return None if the file can't be opened,
+        else a tuple of filename, fingerprint, defaults, sections,
+        and a parsing error or None.
+        """
+        try:
+            fingerprint, data = self._zreadfile(filename)
+        except OSError:
+            return None
+        if isinstance(filename, os.PathLike):
+            filename = os.fspath(filename)
+        scratch = self._zscratch()
+        error = None
+        try:
+            self._zparse(scratch, data, filename, encoding)
+        except Exception as e:
+            error = e
+        return (filename, fingerprint,
+            scratch._defaults, scratch._sections, error)
+
+    def _zmergefile(self, parsed, encoding, read_ok):
+        if parsed is None:
+            return
+        filename, fingerprint, defaults, sections, error = parsed
+        # as `ConfigParser`, keep valid parts when errors
+        self._zmerge(defaults, sections)
+        if error is not None:
+            raise error
+        # in the order of the last reads, to override as reading again
+        self._zsources.pop(filename, None)
+        self._zsources[filename] = _ZSource(
+            encoding, fingerprint, defaults, sections)
+        read_ok.append(filename)
+
+    def _zreadfile(self, filename, fingerprint=None):
+        """Return a fingerprint and bytes of a file.
+
+        Return None instead,
+        if size and modification time are the same as ``fingerprint``.
+        """
+        with open(filename, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            if fingerprint and fingerprint[:2] == (
+                    stat.st_size, stat.st_mtime_ns):
+                return None
+            data = f.read()
+        digest = hashlib.sha1(data).digest()
+        return (stat.st_size, stat.st_mtime_ns, digest), data
+
+    def _zscratch(self):
+        """Return a shallow copy of the parser, with no sections.
+
+        It has the same settings, to parse files separately.
+        """
+        scratch = copy.copy(self)
+        scratch._sections = ZDict(ZSEP=self.ZSEP)
+        scratch._defaults = {}
+        scratch._proxies = {}
+        scratch._zsnapshot = None
+        scratch._zmisses = {}
+        scratch._zkeysets = {}
+        scratch._zinterpolated = {}
+        scratch._zconverted = {}
+        scratch._zsources = {}
+        return scratch
+
+    def _zparse(self, scratch, data, filename, encoding):
+        """Parse a file's bytes with a scratch parser.
+
+        Return defaults and sections of the file.
+        """
+        fp = io.TextIOWrapper(io.BytesIO(data), encoding=encoding)
+        scratch._read(fp, filename)
+        return scratch._defaults, scratch._sections
+
+    def _zmerge(self, defaults, sections):
+        self._zmodify()
+        with self._zbatch():
+            self._defaults.update(defaults)
+            for section, options in sections.items():
+                if section not in self._sections:
+                    self._sections[section] = self._dict()
+                self._sections[section].update(options)
+
+    @classmethod
+    def from_sections(cls, records, **kwargs):
+        """Create a config from (shortname, parent names, options) records.
+
+        It is a fast alternative to `read_dict` for many sections,
+        not splitting section names,
+        and validating sections structure only once at the end
+        (raising `ZValidationError`).
+        Records of the default section (without parents) update defaults.
+
+        Option names are converted by `optionxform`, and values by ``str``
+        (except None), but values are not checked for interpolation syntax.
+        ``kwargs`` are passed to the constructor.
+        """
+        config = cls(**kwargs)
+        config._sections.zextend(config._zrecords(records))
+        config.validate()
+        return config
+
+    def _zrecords(self, records):
+        optionxform = self.optionxform
+        for shortname, parents, options in records:
+            options = {optionxform(str(option)):
+                value if value is None else str(value)
+                for option, value in options.items()}
+            if shortname == self.default_section and not parents:
+                self._defaults.update(options)
+                continue
+            yield shortname, parents, options
+
+    def use_sqlite(self, path, cache_size=1024):
+        """Keep sections in a SQLite database file, instead of in memory.
+
+        Sections already in the file are added to the config,
+        and sections already in the config are added to the file
+        (updating options of the same sections).
+        After this, sections and options are read from the file
+        (keeping ``cache_size`` recently used sections in memory),
+        and changes are written to it.
+
+        Only section names (and zsection structure) are kept in memory.
+        """
+        self._zmodify()
+        store = _ZSQLiteStore(path, cache_size)
+        with store.batch():
+            meta = store.meta()
+            if meta.get('ZSEP', self.ZSEP) != self.ZSEP:
+                raise ValueError('ZSEP of %r is %r, not %r'
+                    % (path, meta['ZSEP'], self.ZSEP))
+            store.set_meta('ZSEP', self.ZSEP)
+            store.set_meta('default_section', self.default_section)
+            names = store.names()
+            sections = ZDict(ZSEP=self.ZSEP)
+            for section in names:
+                if section != self.default_section:
+                    sections[section] = _ZStoredSection(store, section)
+            sections.zstore = store
+            for section, options in self._sections.items():
+                if section in sections:
+                    sections[section].update(options)
+                else:
+                    sections[section] = options
+            if self.default_section not in names:
+                store.add(self.default_section, [], {})
+            defaults = _ZStoredSection(store, self.default_section)
+            defaults.update(self._defaults)
+        self._sections = sections
+        self._defaults = defaults
+
+    def reload(self):
+        """Read files read by `read` again, only if they are modified.
+
+        Only sections in modified files are compared,
+        and only changed sections (and descendants) are invalidated.
+        Sections and options not from files are kept,
+        unless files change them.
+        Files override each other in the order they were last read.
+
+        Return a list of modified files.
+        """
+        modified = {}
+        for filename, source in self._zsources.items():
+            try:
+                result = self._zreadfile(filename, source.fingerprint)
+            except OSError:
+                if source.fingerprint == _ZMISSING:
+                    continue  # already removed, until it appears again
+                modified[filename] = source._replace(
+                    fingerprint=_ZMISSING, defaults={}, sections={})
+                continue
+            if result is None:
+                continue
+            fingerprint, data = result
+            if fingerprint[2] == source.fingerprint[2]:
+                self._zsources[filename] = source._replace(
+                    fingerprint=fingerprint)
+                continue
+            defaults, sections = self._zparse(
+                self._zscratch(), data, filename, source.encoding)
+            modified[filename] = source._replace(fingerprint=fingerprint,
+                defaults=defaults, sections=sections)
+        if not modified:
+            return []
+
+        if self._zsnapshot is None:
+            self._zapply(modified)
+            return list(modified)
+
+        # copy-on-write, readers only see `_zsnapshot`
+        shadow = self._zscratch()
+        shadow._zsources = dict(self._zsources)
+        if self._sections.zstore is None:
+            for section, options in self._sections.items():
+                shadow._sections[section] = dict(options)
+            shadow._defaults = dict(self._defaults)
+        else:
+            # readers only see the snapshot's dictionaries, not the store
+            shadow._sections = self._sections.copy()
+            shadow._defaults = self._defaults
+        with shadow._zbatch():
+            shadow._zapply(modified)
+        snapshot = shadow._zsnap()
+        proxies = _ZProxies(self)
+        for section, proxy in self._proxies.items():
+            if section in shadow._sections:
+                proxies[section] = proxy
+        self._zsnapshot = snapshot
+        self._sections = shadow._sections
+        self._defaults = shadow._defaults
+        self._proxies = proxies
+        self._zsources = shadow._zsources
+        return list(modified)
+
+    def _zapply(self, modified):
+        """Update sections, according to modified sources."""
+        old_sources = list(self._zsources.values())
+        names = {}
+        for filename, source in modified.items():
+            names.update(dict.fromkeys(self._zsources[filename].sections))
+            names.update(dict.fromkeys(source.sections))
+        self._zsources.update(modified)
+        new_sources = list(self._zsources.values())
+
+        self._zupdate(self.default_section, self._defaults,
+            self._zfold(old_sources, None), self._zfold(new_sources, None))
+        changes = []
+        # remove first, not to conflict with new sections
+        for section in names:
+            new = self._zfold(new_sources, section)
+            if new is not None:
+                changes.append((section, new))
+            elif section in self._sections:
+                # keep options not from files (if any)
+                sectiondict = self._sections[section]
+                old = self._zfold(old_sources, section) or {}
+                self._zupdate(section, sectiondict, old, {})
+                if not sectiondict:
+                    self._zmodify(section)
+                    del self._sections[section]
+                    self._proxies.pop(section, None)
+        for section, new in changes:
+            old = self._zfold(old_sources, section) or {}
+            if section not in self._sections:
+                self._zmerge({}, {section: {}})
+            self._zupdate(section, self._sections[section], old, new)
+
+    @staticmethod
+    def _zfold(sources, section):
+        """Merge options of a section (None for defaults) in sources.
+
+        Return None if no source has the section.
+        """
+        merged = None
+        for source in sources:
+            if section is None:
+                options = source.defaults
+            else:
+                options = source.sections.get(section)
+            if options is not None:
+                if merged is None:
+                    merged = {}
+                merged.update(options)
+        return merged
+
+    def _zupdate(self, section, sectiondict, old, new):
+        """Apply changes from old to new options, to a section dictionary.
+
+        Options not changed in files are kept (e.g. set by `set`).
+        """
+        removed = [o for o in old if o not in new and o in sectiondict]
+        changed = {o: v for o, v in new.items()
+            if old.get(o, _UNSET) != v}
+        if removed or changed:
+            self._zmodify(section)
+            for option in removed:
+                del sectiondict[option]
+            sectiondict.update(changed)
+
+    def write_module(self, fp, raw=False):
+        """Write all resolved zsections, as a Python module source.
+
+        It defines ``SECTIONS`` (shortnames -> options, dictionaries),
+        ``ALIASES`` (longnames -> shortnames),
+        and ``DEFAULTS`` (options of the default section).
+        Values are interpolated, unless ``raw`` is True.
+        Importing it (cached as ``.pyc``) replaces reading and resolving,
+        use `ResolvedZConfig.from_module` to look it up.
+        """
+        sections, defaults, aliases = self._zresolved(raw)
+        fp.write('"""Generated by zconfigparser (do not edit)."""\n\n')
+        fp.write('DEFAULT_SECTION = %r\n\n' % (self.default_section,))
+        fp.write('DEFAULTS = %r\n\n' % (defaults,))
+        fp.write('SECTIONS = {\n')
+        for section, options in sections.items():
+            fp.write('    %r: %r,\n' % (section, options))
+        fp.write('}\n\nALIASES = {\n')
+        for longname, shortname in aliases.items():
+            fp.write('    %r: %r,\n' % (longname, shortname))
+        fp.write('}\n')
+
+    def _zresolved(self, raw=False):
+        """Return resolved zsections, defaults, and longnames -> shortnames.
+
+        Values are interpolated (as `interpolate_all`), unless ``raw``.
+        """
+        if raw:
+            sections = self.resolve_all()
+            defaults = dict(self._defaults)
+        else:
+            sections = self.interpolate_all()
+            defaults = sections.pop(self.default_section)
+        zdata = self._sections.zdata
+        aliases = {}
+        for longname in self._sections:
+            shortname = self._sections._zsplit(longname)[0]
+            if longname != shortname and zdata.get(shortname) == longname:
+                aliases[longname] = shortname
+        return sections, defaults, aliases
+
+    def export_shared(self, name=None, raw=False):
+        """Write all resolved zsections to a new shared memory block.
+
+        Return ``multiprocessing.shared_memory.SharedMemory``,
+        to attach with `SharedZConfig` (in other processes).
+        The caller owns the block, and should ``unlink`` it when done.
+        Values are interpolated, unless ``raw`` is True.
+
+        The block has a table of sorted section names (short and long),
+        tables of sorted options for each shortname,
+        and a string table (UTF-8) of distinct names and values.
+        """
+        from multiprocessing import shared_memory
+
+        sections, defaults, aliases = self._zresolved(raw)
+        sections[self.default_section] = defaults
+        strings = {}
+        table = bytearray()
+
+        def add_string(string):
+            data = string.encode('utf-8')
+            offset = strings.get(data)
+            if offset is None:
+                offset = strings[data] = len(table)
+                table.extend(data)
+            return offset, len(data)
+
+        ranges = {}
+        option_entries = []
+        for section, options in sections.items():
+            ranges[section] = len(option_entries), len(options)
+            items = sorted(options.items(),
+                key=lambda item: item[0].encode('utf-8'))
+            for option, value in items:
+                entry = add_string(option)
+                if value is None:
+                    entry += (_ZSHM_NONE, 0)
+                else:
+                    entry += add_string(value)
+                option_entries.append(entry)
+
+        names = [(section, _ZSHM_SHORT) for section in sections]
+        names[-1] = self.default_section, _ZSHM_DEFAULT
+        names.extend((longname, _ZSHM_LONG) for longname in aliases)
+        name_entries = []
+        for section, kind in names:
+            shortname = aliases.get(section, section)
+            name_entries.append(
+                add_string(section) + ranges[shortname] + (kind,))
+        name_entries.sort(key=lambda e: bytes(table[e[0]:e[0] + e[1]]))
+
+        names_offset = _ZSHM_HEADER.size
+        options_offset = names_offset + _ZSHM_NAME.size * len(name_entries)
+        strings_offset = options_offset + (
+            _ZSHM_OPTION.size * len(option_entries))
+        size = strings_offset + len(table)
+        shm = shared_memory.SharedMemory(name, create=True, size=size)
+        buf = shm.buf
+        _ZSHM_HEADER.pack_into(buf, 0, _ZSHM_MAGIC, _ZSHM_VERSION,
+            len(name_entries), options_offset, strings_offset)
+        for i, entry in enumerate(name_entries):
+            _ZSHM_NAME.pack_into(buf, names_offset + _ZSHM_NAME.size * i,
+                *entry)
+        for i, entry in enumerate(option_entries):
+            _ZSHM_OPTION.pack_into(
+                buf, options_offset + _ZSHM_OPTION.size * i, *entry)
+        buf[strings_offset:size] = table
+        return shm
+
+    def read_lazy(self, filename, encoding=None):
+        """Read a file lazily, parsing each section on first access.
+
+        The file is memory-mapped, and only scanned for section headers,
+        to record zsection structure.
+        Section bodies are parsed when looked-up (`get` etc.).
+        So it is fast and light,
+        for a huge file of which only a few sections are used.
+
+        Section headers must start at the beginning of lines,
+        and the encoding must be ASCII compatible (e.g. UTF-8).
+        The default section is parsed immediately.
+        The file is not tracked by `reload`.
+        """
+        self._zmodify()
+        encoding = io.text_encoding(encoding)
+        if encoding == 'locale':
+            encoding = locale.getpreferredencoding(False)
+        with open(filename, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if isinstance(filename, os.PathLike):
+            filename = os.fspath(filename)
+        lazyfile = _ZLazyFile(filename, encoding, data)
+
+        headers = [(m.start(), m.group(1).decode(encoding))
+            for m in _ZHEADERCRE.finditer(data)]
+        if not headers:
+            headers = [(len(data), None)]
+        eager = [(0, headers[0][0])]  # (comments) before the first header
+        spans = {}
+        for i, (start, section) in enumerate(headers):
+            if section is None:
+                continue
+            end = headers[i + 1][0] if i + 1 < len(headers) else len(data)
+            if section in spans and self._strict:
+                lineno = data[:start].count(b'\n') + 1
+                raise configparser.DuplicateSectionError(
+                    section, filename, lineno)
+            if section == self.default_section or (
+                    section in self._sections and section not in spans):
+                eager.append((start, end))
+            else:
+                spans.setdefault(section, []).append((start, end))
+        for section in spans:
+            if section in self._sections:  # so, non-strict duplicates
+                eager.extend(spans.pop(section))
+
+        scratch = self._zscratch()
+        text = ''.join(data[start:end].decode(encoding)
+            for start, end in eager)
+        scratch._read(io.StringIO(text), filename)
+        self._zmerge(scratch._defaults, scratch._sections)
+        for section, section_spans in spans.items():
+            self._sections[section] = _ZLazySection(
+                self, lazyfile, section, section_spans)
+
+    def _zparse_lazy(self, lazyfile, section, spans):
+        data = lazyfile.data
+        text = ''.join(data[start:end].decode(lazyfile.encoding)
+            for start, end in spans)
+        scratch = self._zscratch()
+        scratch._read(io.StringIO(text), lazyfile.filename)
+        return scratch._sections[section]
+
+    def iter_zsections(self, f, source=None):
+        """Parse a file object, and yield sections one by one.
+
+        Yield (shortname, longname, parent names, options) for each section,
+        options being a dictionary of raw values (not inherited).
+        The default section is yielded as others, if any.
+
+        Only one section is in memory at a time,
+        and the config itself is not changed.
+        Section headers must start at the beginning of lines,
+        and line numbers in errors are counted from the section header.
+        """
+        if source is None:
+            source = getattr(f, 'name', '<???>')
+        zsplit = self._sections._zsplit
+        seen = set()
+        lines = []
+        for line in itertools.chain(f, [None]):
+            if line is not None and not (
+                    line[:1] == '[' and self.SECTCRE.match(line.strip())):
+                lines.append(line)
+                continue
+            if lines:
+                scratch = self._zscratch()
+                scratch._read(lines, source)
+                lines = []
+                if scratch._defaults:
+                    yield (self.default_section, self.default_section,
+                        [], scratch._defaults)
+                for longname, options in scratch._sections.items():
+                    if self._strict and longname in seen:
+                        raise configparser.DuplicateSectionError(
+                            longname, source)
+                    seen.add(longname)
+                    shortname, *parents = zsplit(longname)
+                    yield shortname, longname, parents, options
+            if line is not None:
+                lines.append(line)
+
+    def _join_multiline_values(self):
+        """Override `ConfigParser`'s method.
+
+        The same as the original,
+        except skipping lazy sections not parsed yet.
+        """
+        defaults = self.default_section, self._defaults
+        all_sections = itertools.chain((defaults,), self._sections.items())
+        for section, options in all_sections:
+            if isinstance(options, _ZLazySection) and not options.zloaded:
+                continue
+            for name, val in options.items():
+                if isinstance(val, list):
+                    val = '\n'.join(val).rstrip()
+                options[name] = self._interpolation.before_read(
+                    self, section, name, val)
+
+    def save_snapshot(self, path):
+        """Save sections and internal indexes to a binary file (pickle).
+
+        Fingerprints of files read by `read` are also saved,
+        to check them in `load_snapshot`.
+        """
+        state = {
+            'version': _ZSNAPSHOT_VERSION,
+            'settings': self._zsettings(),
+            'sources': self._zsources,
+            'defaults': self._defaults,
+            'sections': self._sections,
+        }
+        with open(path, 'wb') as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def load_snapshot(self, path, sources=None, encoding=None):
+        """Load a snapshot file saved by `save_snapshot`.
+
+        Use it with a new parser (the snapshot replaces current sections).
+        If ``sources`` (files, as in `read`) are not the same as saved,
+        or any of them is modified (size, modification time and hash),
+        or parser settings differ (`optionxform`, delimiters etc.),
+        or the snapshot is not usable, just `read` ``sources`` instead.
+        ``sources`` defaults to the files saved in the snapshot.
+
+        Return a list of successfully read files, as `read`.
+        Note it is a pickle, so only load trusted files.
+        """
+        self._zmodify()
+        state = self._zload_snapshot(path)
+        if sources is None:
+            sources = [] if state is None else list(state['sources'])
+        elif isinstance(sources, (str, bytes, os.PathLike)):
+            sources = [sources]
+        if state is None or not self._zcheck_snapshot(state, sources):
+            return self.read(sources, encoding=encoding)
+
+        self._sections = state['sections']
+        self._defaults = state['defaults']
+        self._zsources = state['sources']
+        self._proxies = _ZProxies(self)
+        return list(self._zsources)
+
+    def _zload_snapshot(self, path):
+        try:
+            with open(path, 'rb') as f:
+                state = pickle.load(f)
+        except Exception:  # any broken snapshot, just ignore
+            return None
+        if not isinstance(state, dict) or (
+                state.get('version') != _ZSNAPSHOT_VERSION):
+            return None
+        return state
+
+    def _zsettings(self):
+        """Return parser settings affecting parsed data (for snapshots).
+
+        Functions and classes are compared by their qualified names.
+        """
+        def name(obj):
+            obj = getattr(obj, '__func__', obj)
+            if not hasattr(obj, '__qualname__'):
+                obj = type(obj)
+            return obj.__module__, obj.__qualname__
+
+        return {
+            'ZSEP': self.ZSEP,
+            'default_section': self.default_section,
+            'optionxform': name(self.optionxform),
+            'delimiters': self._delimiters,
+            'comment_prefixes': self._comment_prefixes,
+            'inline_comment_prefixes': self._inline_comment_prefixes,
+            'strict': self._strict,
+            'allow_no_value': self._allow_no_value,
+            'empty_lines_in_values': self._empty_lines_in_values,
+            'SECTCRE': self.SECTCRE.pattern,
+            'OPTCRE': self._optcre.pattern,
+            'interpolation': name(self._interpolation),
+        }
+
+    def _zcheck_snapshot(self, state, sources):
+        if state['settings'] != self._zsettings():
+            return False
+        if [os.fspath(s) for s in sources] != list(state['sources']):
+            return False
+        for filename, source in state['sources'].items():
+            try:
+                result = self._zreadfile(filename, source.fingerprint)
+            except OSError:
+                return False
+            if result is not None and result[0][2] != source.fingerprint[2]:
+                return False
+        return True
+
+    def zchildren(self, section):
+        """Return shortnames of zsections directly inheriting the section."""
+        return self._sections.zchildren(section)
+
+    def zdescendants(self, section):
+        """Return shortnames of zsections inheriting the section.
+
+        It includes children, grandchildren, and so on.
+        """
+        return self._sections.zdescendants(section)
+
+    def validate(self):
+        """Check sections structure config-wide.
+
+        Raise `ZValidationError`, with all errors found
+        (`NoZSectionError`, `DuplicateZKeyError` and `RecursiveZkeyError`).
+        After a successful validation,
+        `get` skips circular zkey checks.
+        """
+        errors = []
+        for error in self._sections.zvalidate():
+            if isinstance(error, ZKeyError):
+                error = NoZSectionError(error.key)
+            errors.append(error)
+        if errors:
+            raise ZValidationError(errors)
+
+    def compile_schema(self, schema, sections=None):
+        """Return a dictionary of section names -> records of ``schema``.
+
+        ``schema`` is a `ZSchema`.
+        ``sections`` is a list of section names (short or long),
+        defaulting to all sections (keyed by both short and long names).
+        Values are interpolated and converted (as `getint` etc.),
+        and missing options get defaults.
+        Raise `ZValidationError`, with all errors found
+        (`NoZSectionError`, `NoZOptionError`, `ZConversionError`
+        and interpolation errors).
+        """
+        if sections is None:
+            zdict = self._zdict()
+            sections = []
+            for longname in self.sections():
+                shortname = zdict._zsplit(longname)[0]
+                sections.append((longname, [shortname, longname]))
+        else:
+            sections = [(section, [section]) for section in sections]
+        converters = [(option, self._convert_to_boolean if conv is bool
+            else conv) for option, conv in schema.converters.items()]
+        records = {}
+        errors = []
+        for section, names in sections:
+            values = []
+            count = len(errors)
+            for option, conv in converters:
+                try:
+                    value = self.get(section, option)
+                except configparser.NoOptionError as e:
+                    if option not in schema.defaults:
+                        errors.append(e)
+                    values.append(schema.defaults.get(option))
+                    continue
+                except (configparser.NoSectionError, ZDictError) as e:
+                    errors.append(e)  # e.g. circular zsections
+                    break
+                except configparser.Error as e:
+                    errors.append(e)
+                    continue
+                if value is None:  # ``allow_no_value``
+                    errors.append(ZConversionError(option, section,
+                        value, 'no value'))
+                    continue
+                try:
+                    values.append(conv(value))
+                except (ValueError, TypeError) as e:
+                    errors.append(ZConversionError(option, section,
+                        value, e))
+            if len(errors) == count:
+                record = schema.record._make(values)
+                for name in names:
+                    records[name] = record
+        if errors:
+            raise ZValidationError(errors)
+        return records
+
+    def _zdict(self):
+        snapshot = self._zsnapshot
+        return self._sections if snapshot is None else snapshot.zdict
+
+    def zsections(self):
+        """Return all section shortnames and longnames."""
+        return self._zdict().zkeys()
+
+    def has_zsection(self, section):
+        """Check section name (whether short or long)."""
+        return self._zdict().zcontains(section)
+
+    def has_zoption(self, section, option):
+        """Check option name in a zsection (whether short or long)."""
+        return self.zlookup(section, option, _UNSET, raw=True) is not _UNSET
+
+
+# a parser in each process of `ZConfigParser.read_parallel`
+_zworker = None
+
+
+def _zworker_init(cls, init, optionxform):
+    global _zworker
+    args, kwargs = init
+    _zworker = cls(*args, **kwargs)
+    if optionxform is not None:
+        _zworker.optionxform = optionxform
+
+
+def _zworker_parse(filename, encoding):
+    """Parse a file, and return it as `ZConfigParser._zparsefile`.
+
+    Sections are plain dictionaries (of long names), to pass cheaply.
+    """
+    parsed = _zworker._zparsefile(filename, encoding)
+    if parsed is None:
+        return None
+    filename, fingerprint, defaults, sections, error = parsed
+    sections = {section: dict(options)
+        for section, options in sections.items()}
+    return filename, fingerprint, defaults, sections, error
+
+
+class ResolvedZConfig(object):
+    """Read-only config, from already resolved zsections.
+
+    It has the same lookup methods as `ZConfigParser`
+    (`get`, `has_zsection`, `has_zoption` and `zsections`),
+    but each lookup is just a dictionary lookup.
+    Values are used as is (no interpolation).
+
+    ``sections`` is shortnames -> options (dictionaries),
+    merging inherited options and defaults.
+    ``aliases`` is longnames -> shortnames.
+    """
+
+    def __init__(self, sections, aliases=None, defaults=None,
+            default_section=configparser.DEFAULTSECT, optionxform=str.lower):
+        self._sections = sections
+        self._aliases = aliases or {}
+        self._defaults = defaults or {}
+        self.default_section = default_section
+        self.optionxform = optionxform
+
+    @classmethod
+    def from_module(cls, module, **kwargs):
+        """Create from a module written by `ZConfigParser.write_module`."""
+        return cls(module.SECTIONS, module.ALIASES, module.DEFAULTS,
+            module.DEFAULT_SECTION, **kwargs)
+
+    def _options(self, section):
+        options = self._sections.get(section)
+        if options is None:
+            if section in self._aliases:
+                return self._sections[self._aliases[section]]
+            if section == self.default_section:
+                return self._defaults
+        return options
+
+    def get(self, section, option, *, fallback=_UNSET):
+        options = self._options(section)
+        if options is None:
+            if fallback is _UNSET:
+                raise NoZSectionError(section)
+            return fallback
+        try:
+            return options[self.optionxform(option)]
+        except KeyError:
+            if fallback is _UNSET:
+                raise NoZOptionError(option, section)
+            return fallback
 
     def zsections(self):
         """Return all section shortnames and longnames."""
-        return self._sections.zkeys()
+        return self._sections.keys() | self._aliases.keys()
 
     def has_zsection(self, section):
         """Check section name (whether short or long)."""
-        return self._sections.zcontains(section)
+        return section in self._sections or section in self._aliases
 
     def has_zoption(self, section, option):
         """Check option name in a zsection (whether short or long)."""
+        options = self._options(section)
+        return options is not None and self.optionxform(option) in options
+
+
+class _ZSharedOptions(collections.abc.Mapping):
+    """Options of a section in `SharedZConfig` (binary searched)."""
+
+    def __init__(self, config, start, count):
+        self._config = config
+        self._start = start
+        self._count = count
+
+    def _entry(self, i):
+        config = self._config
+        return _ZSHM_OPTION.unpack_from(
+            config._buf, config._options_offset + _ZSHM_OPTION.size * i)
+
+    def __getitem__(self, key):
+        config = self._config
+        data = key.encode('utf-8')
+        lo, hi = self._start, self._start + self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            offset, length, value_offset, value_length = self._entry(mid)
+            option = config._bytes(offset, length)
+            if option < data:
+                lo = mid + 1
+            elif option > data:
+                hi = mid
+            elif value_offset == _ZSHM_NONE:
+                return None
+            else:
+                return config._bytes(
+                    value_offset, value_length).decode('utf-8')
+        raise KeyError(key)
+
+    def __iter__(self):
+        for i in range(self._start, self._start + self._count):
+            offset, length = self._entry(i)[:2]
+            yield self._config._bytes(offset, length).decode('utf-8')
+
+    def __len__(self):
+        return self._count
+
+
+class SharedZConfig(ResolvedZConfig):
+    """Read-only config, in a shared memory block.
+
+    The block is written by `ZConfigParser.export_shared`.
+    ``shm`` is its name, or ``multiprocessing.shared_memory.SharedMemory``
+    (e.g. inherited by forked processes).
+
+    It has the same lookup methods as `ResolvedZConfig`,
+    reading (binary searching) the block directly,
+    so processes share one copy of the config.
+    """
+
+    def __init__(self, shm, optionxform=str.lower):
+        if isinstance(shm, str):
+            from multiprocessing import shared_memory
+            try:
+                # not to unlink the block when this process exits
+                shm = shared_memory.SharedMemory(shm, track=False)
+            except TypeError:  # Python < 3.13
+                shm = self._zattach(shared_memory, shm)
+        self._shm = shm
+        self._buf = shm.buf
+        header = _ZSHM_HEADER.unpack_from(self._buf)
+        magic, version, self._length = header[:3]
+        self._options_offset, self._strings_offset = header[3:]
+        if magic != _ZSHM_MAGIC or version != _ZSHM_VERSION:
+            raise ValueError('Not a zconfigparser shared memory block: %r'
+                % shm.name)
+        self.default_section = self._find_default()
+        self.optionxform = optionxform
+
+    @staticmethod
+    def _zattach(shared_memory, name):
+        # attach without registering the block to the resource tracker
+        # (unregistering afterwards removes the creator's registration,
+        # since forked processes share the creator's tracker)
+        from multiprocessing import resource_tracker
+
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: None
         try:
-            self.get(section, option)
-            return True
-        except (NoZSectionError, NoZOptionError, ZKeyError):
-            return False
+            return shared_memory.SharedMemory(name)
+        finally:
+            resource_tracker.register = register
+
+    def close(self):
+        """Detach from the shared memory block."""
+        self._buf = None
+        self._shm.close()
+
+    def _bytes(self, offset, length):
+        offset += self._strings_offset
+        return self._buf[offset:offset + length].tobytes()
+
+    def _names(self):
+        for i in range(self._length):
+            yield _ZSHM_NAME.unpack_from(
+                self._buf, _ZSHM_HEADER.size + _ZSHM_NAME.size * i)
+
+    def _find_default(self):
+        for offset, length, start, count, kind in self._names():
+            if kind == _ZSHM_DEFAULT:
+                return self._bytes(offset, length).decode('utf-8')
+
+    def _find(self, section):
+        data = section.encode('utf-8')
+        lo, hi = 0, self._length
+        while lo < hi:
+            mid = (lo + hi) // 2
+            entry = _ZSHM_NAME.unpack_from(
+                self._buf, _ZSHM_HEADER.size + _ZSHM_NAME.size * mid)
+            name = self._bytes(*entry[:2])
+            if name < data:
+                lo = mid + 1
+            elif name > data:
+                hi = mid
+            else:
+                return entry
+        return None
+
+    def _options(self, section):
+        entry = self._find(section)
+        if entry is None:
+            return None
+        return _ZSharedOptions(self, entry[2], entry[3])
+
+    def zsections(self):
+        """Return all section shortnames and longnames."""
+        return {self._bytes(offset, length).decode('utf-8')
+            for offset, length, start, count, kind in self._names()
+            if kind != _ZSHM_DEFAULT}
+
+    def has_zsection(self, section):
+        """Check section name (whether short or long)."""
+        entry = self._find(section)
+        return entry is not None and entry[4] != _ZSHM_DEFAULT